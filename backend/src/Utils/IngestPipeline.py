@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from Utils.ragUtils import EmbGenerator
+from Utils.ragUtils import ScrapeProfs
+
+# Staged professor ingestion:
+#   fetch (thread pool, per-host limits) -> parse (process pool) -> embed (batched) -> write (batched)
+# A checkpoint file records every finished url so a crashed run picks up where it stopped; it is
+# cleared once a run ends with no failures, so the next scheduled run crawls everything again.
+# With a validator cache, re-runs send conditional GETs and pages answering 304 skip every
+# later stage; pages that did change are only re-embedded if their details text changed.
+
+
+class HostLimiter:
+    """At most per_host requests in flight per host, spaced at least min_interval seconds apart."""
+
+    def __init__(self, per_host: int = 2, min_interval: float = 0.5):
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.slots: dict[str, threading.Semaphore] = {}
+        self.next_time: dict[str, float] = {}
+
+    def acquire(self, host: str) -> None:
+        with self.lock:
+            slot = self.slots.setdefault(host, threading.Semaphore(self.per_host))
+        slot.acquire()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time.get(host, now))
+            self.next_time[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, host: str) -> None:
+        self.slots[host].release()
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+        self.done: set[str] = set()
+        self.failed: dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.done = set(data.get("done", []))
+            self.failed = data.get("failed", {})
+
+    def mark_Done(self, urls: list[str]) -> None:
+        self.done.update(urls)
+        for url in urls:
+            self.failed.pop(url, None)
+
+    def mark_Failed(self, url: str, error: str) -> None:
+        self.failed[url] = error
+
+    def clear(self) -> None:
+        self.done.clear()
+        self.failed.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self) -> None:
+        # Write-then-rename so a crash mid-write never leaves a truncated checkpoint
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done), "failed": self.failed}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+class IngestPipeline:
+    def __init__(self, uploader, checkpoint_path: str, fetch_workers: int = 8, parse_workers: int = 2,
+                 per_host: int = 2, min_interval: float = 0.5, batch_size: int = EmbGenerator.DEFAULT_BATCH_SIZE,
+                 validator_cache_path: Optional[str] = None, fresh: bool = False):
+        self.uploader = uploader
+        self.checkpoint = Checkpoint(checkpoint_path)
+        if fresh:
+            # Ignore progress left by an earlier, unfinished run
+            self.checkpoint.clear()
+        self.validators = ScrapeProfs.ValidatorCache(validator_cache_path)
+        # ETag/Last-Modified are only stored once the page's batch is written, so a failed
+        # batch is fetched in full again next run instead of answering 304
+        self.pendingValidators: dict[str, dict] = {}
+        self.validatorLock = threading.Lock()
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.limiter = HostLimiter(per_host=per_host, min_interval=min_interval)
+        self.unchangedDetails = 0
+        self.duplicateEmails = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=fetch_workers, pool_maxsize=fetch_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def run(self, urls: list[str]) -> dict:
+        todo = [u for u in dict.fromkeys(urls) if u not in self.checkpoint.done]
+        print(f"{len(urls) - len(todo)} urls already done, {len(todo)} to ingest.")
+        uploaded = 0
+        pending: list[tuple[str, tuple[str, str, str]]] = []
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetchers, \
+                ProcessPoolExecutor(max_workers=self.parse_workers) as parsers:
+            fetches = {fetchers.submit(self.__fetch, url): url for url in todo}
+            parses = {}
+            unchanged = []
+            for future in as_completed(fetches):
+                url = fetches[future]
+                try:
+                    fetched = future.result()
+                    if fetched is None:
+                        unchanged.append(url)
+                    else:
+                        parses[parsers.submit(ScrapeProfs.parse_professor_page, *fetched)] = url
+                except Exception as e:
+                    self.__fail(url, e)
+
+                # Drain finished parses as they come in so embedding overlaps with fetching
+                self.__collect(parses, pending, block=False)
+                while len(pending) >= self.batch_size:
+                    uploaded += self.__flush(pending[:self.batch_size])
+                    del pending[:self.batch_size]
+
+            self.__collect(parses, pending, block=True)
+            for start in range(0, len(pending), self.batch_size):
+                uploaded += self.__flush(pending[start:start + self.batch_size])
+
+        self.checkpoint.mark_Done(unchanged)
+        report = {
+            "uploaded": uploaded,
+            "not_modified": len(unchanged),
+            "unchanged_details": self.unchangedDetails,
+            "duplicate_emails": self.duplicateEmails,
+            "done": len(self.checkpoint.done),
+            "failed": len(self.checkpoint.failed),
+        }
+        print(f"Uploaded {uploaded} professors, {len(unchanged)} pages not modified (304), "
+              f"{self.unchangedDetails} with unchanged details, {self.duplicateEmails} skipped as duplicate emails, "
+              f"{len(self.checkpoint.failed)} urls failed.")
+        if self.checkpoint.failed:
+            # Keep the progress so a re-run only retries what failed
+            self.checkpoint.save()
+        else:
+            self.checkpoint.clear()
+        return report
+
+# ============ STAGES ============= #
+    def __fetch(self, url: str) -> Optional[tuple[str, str]]:
+        """Returns (final_url, html), or None when the page answered 304 Not Modified."""
+        host = urlparse(url).netloc
+        self.limiter.acquire(host)
+        try:
+            headers = {**ScrapeProfs.HEADERS, **self.validators.request_headers(url)}
+            resp = self.session.get(url, headers=headers, timeout=20)
+        finally:
+            self.limiter.release(host)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        with self.validatorLock:
+            self.pendingValidators[url] = dict(resp.headers)
+        return (str(resp.url), resp.text)
+
+    def __collect(self, parses: dict, pending: list, block: bool) -> None:
+        finished = list(as_completed(parses)) if block else [f for f in parses if f.done()]
+        for future in finished:
+            url = parses.pop(future)
+            try:
+                pending.append((url, ScrapeProfs.format_professor_info(future.result())))
+            except Exception as e:
+                self.__fail(url, e)
+
+    def __flush(self, batch: list[tuple[str, tuple[str, str, str]]]) -> int:
+        if not batch:
+            return 0
+        urls = [url for url, _ in batch]
+        try:
+            changed = self.uploader.filter_Changed_Professors([prof for _, prof in batch])
+            self.unchangedDetails += len(batch) - len(changed)
+            # upload_professors_batch writes one row per email; don't embed the extra pages at all
+            profs, emails = [], set()
+            for prof in changed:
+                if prof[1] in emails:
+                    print(f"Professor {prof[0]} shares email {prof[1]} with another professor in this batch. Skipping upload.")
+                    self.duplicateEmails += 1
+                    continue
+                emails.add(prof[1])
+                profs.append(prof)
+            uploaded = 0
+            if profs:
+                embedded = self.uploader.embed_Professors(profs, batch_size=self.batch_size)
+                uploaded = self.uploader.upload_professors_batch(profs, embedded)
+        except Exception as e:
+            for url in urls:
+                self.__fail(url, e)
+            self.checkpoint.save()
+            return 0
+        self.checkpoint.mark_Done(urls)
+        self.checkpoint.save()
+        with self.validatorLock:
+            for url in urls:
+                headers = self.pendingValidators.pop(url, None)
+                if headers is not None:
+                    self.validators.update(url, {k.lower(): v for k, v in headers.items()})
+            self.validators.save()
+        return uploaded
+
+    def __fail(self, url: str, error: Exception) -> None:
+        print(f"Failed to ingest professor at {url}. Error: {error}")
+        self.checkpoint.mark_Failed(url, str(error))
@@ -1,71 +1,255 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_ollama.chat_models import ChatOllama
-from ragUtils import SupabaseAPI as sb
+from collections import OrderedDict
+from concurrent.futures import Executor
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator, Hashable, Optional
+from Utils import SupabaseAPI as sb
+from Utils.ragUtils import EmbGenerator, VectorCodec
+from Utils.ragUtils.ContextBuilder import ContextBuilder
+import os, time, threading, asyncio
 
 #Might have to edit to utilize static method instead of instance method, i.e, Convert to "Conversatin" class, where you quety llm with just a user object. Would also need to create user object.
 
-class LLMRAG:
-    db: sb.SupabaseAPI
+# ============ SHARED CLIENTS ============= #
+# Every LLMRAG shares one ChatOllama and one SupabaseAPI instead of building its own per
+# conversation; LLMPool caps how many generations run against Ollama at the same time.
+
+class LLMPool:
     llm: ChatOllama
-    chunks: list[str]
+    max_concurrency: int
+
+    def __init__(self, model: str = "llama2", temperature: float = 0.7, max_concurrency: int = 2,
+                 base_url: Optional[str] = None):
+        kwargs = {"base_url": base_url} if base_url else {}
+        self.llm = ChatOllama(model=model, temperature=temperature, **kwargs)
+        self.max_concurrency = max_concurrency
+        # Blocking callers (scripts) and event-loop callers (the API) are limited separately
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.asyncSlots: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        # Both kinds of callers update the counters, from any thread
+        self.countLock = threading.Lock()
+
+    @contextmanager
+    def slot(self):
+        self.__count(waiting=1)
+        try:
+            self.slots.acquire()
+        finally:
+            self.__count(waiting=-1)
+        self.__count(active=1)
+        try:
+            yield self.llm
+        finally:
+            self.__count(active=-1)
+            self.slots.release()
+
+    @asynccontextmanager
+    async def async_Slot(self):
+        if self.asyncSlots is None:
+            self.asyncSlots = asyncio.Semaphore(self.max_concurrency)
+        self.__count(waiting=1)
+        try:
+            await self.asyncSlots.acquire()
+        finally:
+            self.__count(waiting=-1)
+        self.__count(active=1)
+        try:
+            yield self.llm
+        finally:
+            self.__count(active=-1)
+            self.asyncSlots.release()
+
+    def stats(self) -> dict:
+        with self.countLock:
+            return {"max_concurrency": self.max_concurrency, "active": self.active, "waiting": self.waiting}
+
+    def __count(self, active: int = 0, waiting: int = 0) -> None:
+        with self.countLock:
+            self.active += active
+            self.waiting += waiting
+
+
+class ContextCache:
+    """
+    Retrieved professor context per (session, match_count), kept for ttl seconds so a
+    multi-turn chat searches the vector store once instead of on every turn.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_key: Hashable, match_count: int) -> Optional[list[dict]]:
+        key = (session_key, match_count)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, session_key: Hashable, match_count: int, chunks: list[dict]) -> None:
+        with self.lock:
+            self.entries[(session_key, match_count)] = (time.monotonic() + self.ttl, chunks)
+            self.entries.move_to_end((session_key, match_count))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries), "ttl": self.ttl, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+_pool: Optional[LLMPool] = None
+_db: Optional[sb.SupabaseAPI] = None
+_builder: Optional[ContextBuilder] = None
+_shared_lock = threading.Lock()
+
+context_cache = ContextCache(ttl=float(os.getenv("LLM_CONTEXT_TTL", "600")),
+                             max_size=int(os.getenv("LLM_CONTEXT_CACHE_SIZE", "10000")))
+
+
+def get_LLM_Pool() -> LLMPool:
+    global _pool
+    if _pool is None:
+        with _shared_lock:
+            if _pool is None:
+                _pool = LLMPool(
+                    model=os.getenv("OLLAMA_MODEL", "llama2"),
+                    temperature=float(os.getenv("LLM_TEMPERATURE", "0.7")),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "2")),
+                    base_url=os.getenv("OLLAMA_BASE_URL"),
+                )
+    return _pool
+
 
-    def __init__(self, user_id: int | None, user_embedding: list[float], match_count: int):
-        self.db = sb.SupabaseAPI()
-        self.__load_model()
-        self.__load_user_context(user_id, user_embedding, match_count)
+def get_Context_Builder() -> ContextBuilder:
+    """Counts tokens with the embedding model's tokenizer, a close stand-in for the chat model's."""
+    global _builder
+    if _builder is None:
+        with _shared_lock:
+            if _builder is None:
+                _builder = ContextBuilder(
+                    token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")),
+                    tokenizer=EmbGenerator.get_Tokenizer(),
+                    rerank=os.getenv("CONTEXT_RERANK", "mmr"),
+                    mmr_lambda=float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7")),
+                    # One batched forward pass per build; passages stay out of the query embedding cache
+                    embed_fn=EmbGenerator.generate_Embeddings,
+                )
+    return _builder
 
-# =========== QUERY LLM WITH RAG ============= 
+
+def get_Shared_DB() -> sb.SupabaseAPI:
+    global _db
+    if _db is None:
+        with _shared_lock:
+            if _db is None:
+                _db = sb.SupabaseAPI()
+    return _db
+
+
+class LLMRAG:
+    db: Optional[sb.SupabaseAPI]
+    pool: LLMPool
+    chunks: list[dict]
+
+    def __init__(self, user_id: int | None, user_embedding: Optional[list[float]], match_count: int,
+                 db: Optional[sb.SupabaseAPI] = None, chunks: Optional[list[dict]] = None,
+                 session_key: Optional[Hashable] = None, executor: Optional[Executor] = None):
+        """
+        Pass chunks when the caller already retrieved the context; otherwise it comes from
+        context_cache (keyed by session_key, or user_id, plus the embedding) or a fresh rag_Search.
+        astream_LLM builds the prompt on executor (the loop's default one if None): packing the
+        context tokenizes every passage and, with CONTEXT_RERANK=mmr-embed, runs the model.
+        """
+        self.db = db
+        self.executor = executor
+        self.pool = get_LLM_Pool()
+        self.context: Optional[str] = None
+        if chunks is not None:
+            self.chunks = chunks
+        else:
+            self.__load_user_context(user_id, user_embedding, match_count, session_key)
+
+# =========== QUERY LLM WITH RAG =============
     def query_LLM(self, question: str) -> str:
 
         if not self.chunks:
             return "No relevant context found to answer the question."
-        
-        context = "\n".join([chunk['details'] for chunk in self.chunks])
-        prompt = self.__create_prompt(context, question)
-
-        messages = [
-            SystemMessage(content="You are a helpful assistant."),
-            HumanMessage(content=prompt)
-        ]
 
-        response = self.llm(messages)
+        with self.pool.slot() as llm:
+            response = llm.invoke(self.__build_messages(question))
 
         return response.content
 
-    def query_LLM(self, question: str) -> str:
-        
-        messages = [
-            SystemMessage(content="You are a helpful assistant."),
-            HumanMessage(content=question)
-        ]
+    async def astream_LLM(self, question: str) -> AsyncIterator[str]:
+        """
+        Same answer as query_LLM, yielded piece by piece as the model generates it.
+        Closing the generator early closes the Ollama stream, so generation stops too.
+        """
+        if not self.chunks:
+            yield "No relevant context found to answer the question."
+            return
 
-        response = self.llm(messages)
+        messages = await asyncio.get_running_loop().run_in_executor(self.executor, self.__build_messages, question)
+        async with self.pool.async_Slot() as llm:
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    yield chunk.content
 
-        return response.content
-    
 # =========== Helper METHODS =============
-    def __load_user_context(self, user_id: int | None, user_embedding: list[float], match_count: int) -> None:
+    def __load_user_context(self, user_id: int | None, user_embedding: Optional[list[float]], match_count: int,
+                            session_key: Optional[Hashable]) -> None:
 
-       #Change this to handle user_id being None
-        if user_id is not None:
-            try:
-                self.chunks = self.db.rag_Search(embedding=user_embedding, match_count=match_count)
-            except Exception as e:
-                print(f"Error during RAG search: {e}")
+        self.chunks = []
+        # Anonymous queries without a session have nothing stable to cache under. The embedding is
+        # part of the key so a user whose interests changed doesn't get the old passages back.
+        owner = session_key if session_key is not None else user_id
+        key = (owner, VectorCodec.digest(user_embedding)) if owner is not None and user_embedding is not None else None
+        if key is not None:
+            cached = context_cache.get(key, match_count)
+            if cached is not None:
+                self.chunks = cached
+                return
 
-        else:
-            try:
-                self.chunks = self.db.rag_Search(embedding=user_embedding, match_count=match_count)
-            except Exception as e:
-                print(f"Error during RAG search: {e}")
-    
-    def __load_model(self) -> None:
         try:
-            self.llm = ChatOllama(model="llama2", temperature=0.7)
+            db = self.db if self.db is not None else get_Shared_DB()
+            self.chunks = db.rag_Search(embedding=user_embedding, match_count=match_count) or []
         except Exception as e:
-            print(f"Error loading LLM: {e}")
-            exit(1)
+            print(f"Error during RAG search: {e}")
+            return
+
+        if key is not None:
+            context_cache.put(key, match_count, self.chunks)
+
+    def __build_messages(self, question: str) -> list:
+        # Assembled once per conversation object: deduped, re-ranked and cut to CONTEXT_TOKEN_BUDGET
+        if self.context is None:
+            self.context = get_Context_Builder().build(self.chunks)
+        prompt = self.__create_prompt(self.context, question)
+
+        return [
+            SystemMessage(content="You are a helpful assistant."),
+            HumanMessage(content=prompt)
+        ]
 
     def __create_prompt(self, context: str, question: str) -> str:
 
@@ -76,4 +260,4 @@ class LLMRAG:
 
         )
 
-        return prompt_template.format(context=context, question=question)
\ No newline at end of file
+        return prompt_template.format(context=context, question=question)
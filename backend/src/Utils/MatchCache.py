@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+from Utils.ragUtils import VectorCodec
+
+# Result cache for /api/matches. Identical requests (same embedding, k and filters) get the
+# same ranking until the professor corpus changes, so the ranking is stored under a key that
+# includes the corpus version; ingestion bumps the version and old entries simply stop matching.
+#
+# MATCH_CACHE_REDIS_URL adds a Redis (or Redis-compatible) layer shared by every worker. It also
+# carries the corpus version, so a bump from the ingestion CLI reaches the API processes. Without
+# it the version is read from the database through set_Version_Source (SupabaseAPI's latest
+# professors.updated_at), which ingestion moves on every write.
+#
+# Redis and the version source are network calls: the *_Async methods run them on the executor
+# given to MatchCache and only touch memory on the event loop.
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+VERSION_KEY = "rfindr:corpus_version"
+# How long a process trusts the shared corpus version before reading it again
+VERSION_REFRESH_SECONDS = 1.0
+
+_redis_client = None
+_redis_lock = threading.Lock()
+_version_source: Optional[Callable[[], str]] = None
+_local_version = 0
+_remote_version = ("", 0.0)   # (value, monotonic time read)
+
+
+def get_Redis():
+    """Shared Redis client, or None when MATCH_CACHE_REDIS_URL is unset or redis isn't installed."""
+    global _redis_client
+    url = os.getenv("MATCH_CACHE_REDIS_URL")
+    if not url or redis is None:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(url, socket_timeout=0.2)
+    return _redis_client
+
+
+def set_Version_Source(source: Optional[Callable[[], str]]) -> None:
+    """Where the corpus version is read from when there is no Redis (a blocking call)."""
+    global _version_source, _remote_version
+    _version_source = source
+    _remote_version = ("", 0.0)
+
+
+def known_Corpus_Version() -> tuple[str, bool]:
+    """The corpus version as last read, without any I/O, and whether it is still fresh."""
+    value, read_at = _remote_version
+    shared = get_Redis() is not None or _version_source is not None
+    fresh = not shared or time.monotonic() - read_at <= VERSION_REFRESH_SECONDS
+    return f"{_local_version}.{value}", fresh
+
+
+def corpus_Version() -> str:
+    """The current corpus version; may read Redis or the database, so keep it off the event loop."""
+    global _remote_version
+    version, fresh = known_Corpus_Version()
+    if fresh:
+        return version
+    client = get_Redis()
+    value = _remote_version[0]
+    try:
+        value = str(int(client.get(VERSION_KEY) or 0)) if client is not None else str(_version_source())
+        _remote_version = (value, time.monotonic())
+    except Exception as e:
+        print(f"Failed to read corpus version: {e}")
+    return f"{_local_version}.{value}"
+
+
+def bump_Corpus_Version() -> None:
+    """Call after professors or their embeddings change so cached rankings are not served again."""
+    global _local_version, _remote_version
+    _local_version += 1
+    client = get_Redis()
+    if client is not None:
+        try:
+            _remote_version = (str(client.incr(VERSION_KEY)), time.monotonic())
+        except Exception as e:
+            print(f"Failed to bump corpus version in Redis: {e}")
+    else:
+        # The write itself moved the database version; read it again on next use
+        _remote_version = (_remote_version[0], 0.0)
+
+
+class MatchCache:
+    max_size: int
+    ttl: float
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0, prefix: str = "rfindr:matches:",
+                 executor: Optional[Executor] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.prefix = prefix
+        # Runs Redis and version reads for the *_Async methods and Redis writes for put
+        self.executor = executor
+        self.entries: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.hitSeconds = 0.0
+        self.missSeconds = 0.0
+
+    def key(self, embedding, match_count: int, match_threshold: Optional[float] = None,
+            department: Optional[str] = None, require_email: bool = False,
+            version: Optional[str] = None) -> str:
+        digest = VectorCodec.digest(embedding)
+        filters = json.dumps([match_count, match_threshold, department, require_email])
+        if version is None:
+            version = corpus_Version()
+        return f"{version}:{digest}:{hashlib.sha1(filters.encode()).hexdigest()[:16]}"
+
+    async def key_Async(self, embedding, match_count: int, match_threshold: Optional[float] = None,
+                        department: Optional[str] = None, require_email: bool = False) -> str:
+        version, fresh = known_Corpus_Version()
+        if not fresh:
+            version = await asyncio.get_running_loop().run_in_executor(self.executor, corpus_Version)
+        return self.key(embedding, match_count, match_threshold=match_threshold, department=department,
+                        require_email=require_email, version=version)
+
+    def get(self, key: str) -> Optional[list[dict]]:
+        matches = self.__get_Local(key)
+        if matches is None and get_Redis() is not None:
+            matches = self.__get_Remote(key)
+        return matches
+
+    async def get_Async(self, key: str) -> Optional[list[dict]]:
+        matches = self.__get_Local(key)
+        if matches is None and get_Redis() is not None:
+            matches = await asyncio.get_running_loop().run_in_executor(self.executor, self.__get_Remote, key)
+        return matches
+
+    def put(self, key: str, matches: list[dict]) -> None:
+        """Store locally now; the Redis write runs on the executor when there is one."""
+        self.__remember(key, matches)
+        if get_Redis() is None:
+            return
+        if self.executor is not None:
+            self.executor.submit(self.__put_Remote, key, matches)
+        else:
+            self.__put_Remote(key, matches)
+
+    def record(self, hit: bool, seconds: float) -> None:
+        """Request latency, split by whether the ranking came from the cache."""
+        with self.lock:
+            if hit:
+                self.hits += 1
+                self.hitSeconds += seconds
+            else:
+                self.misses += 1
+                self.missSeconds += seconds
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "redis": get_Redis() is not None,
+            "corpus_version": known_Corpus_Version()[0],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "hit_latency_ms": 1000 * self.hitSeconds / self.hits if self.hits else 0.0,
+            "miss_latency_ms": 1000 * self.missSeconds / self.misses if self.misses else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+# ============ Helper METHODS ============= #
+    def __get_Local(self, key: str) -> Optional[list[dict]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self.entries.move_to_end(key)
+                    return entry[1]
+                del self.entries[key]
+        return None
+
+    def __get_Remote(self, key: str) -> Optional[list[dict]]:
+        try:
+            raw = get_Redis().get(self.prefix + key)
+        except Exception as e:
+            print(f"Failed to read match cache from Redis: {e}")
+            return None
+        if raw is None:
+            return None
+        matches = json.loads(raw)
+        self.__remember(key, matches)
+        return matches
+
+    def __put_Remote(self, key: str, matches: list[dict]) -> None:
+        try:
+            get_Redis().set(self.prefix + key, json.dumps(matches), ex=max(1, int(self.ttl)))
+        except Exception as e:
+            print(f"Failed to write match cache to Redis: {e}")
+
+    def __remember(self, key: str, matches: list[dict]) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, matches)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+# Minimal in-process metrics with Prometheus text exposition (served at /metrics), so we can
+# see where each request's time goes without pulling in a metrics client library.
+#   metrics.stage("embed")          histogram rfindr_stage_seconds{stage="embed"}
+#   metrics.observe(name, s, ...)   any other histogram
+#   metrics.inc(name, ...)          counters
+#   metrics.add_Collector(fn)       gauges read at scrape time (cache sizes, hit rates, ...)
+# With OTEL_ENABLED=1 and opentelemetry-api installed, every stage is also an OpenTelemetry span.
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+# Seconds; covers a cache hit (sub-millisecond) up to a cold model / slow RPC
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, prefix: str = "rfindr", buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.histograms: dict[tuple[str, tuple], Histogram] = {}
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self.collectors: list[Callable[[], list[tuple[str, dict, float]]]] = []
+        self.lock = threading.Lock()
+        self.tracer = trace.get_tracer(prefix) if trace is not None and os.getenv("OTEL_ENABLED", "0") == "1" else None
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        span = self.tracer.start_as_current_span(name) if self.tracer is not None else nullcontext()
+        start = time.perf_counter()
+        with span:
+            try:
+                yield
+            finally:
+                self.observe("stage_seconds", time.perf_counter() - start, stage=name, **labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def add_Collector(self, fn: Callable[[], list[tuple[str, dict, float]]]) -> None:
+        """fn returns (name, labels, value) gauges; it is called on every scrape."""
+        self.collectors.append(fn)
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        with self.lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines = []
+        for name in sorted({n for n, _ in histograms}):
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full} histogram")
+            for (n, labels), (counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    lines.append(f"{full}_bucket{self.__labels(labels, le=repr(bound))} {cumulative}")
+                lines.append(f"{full}_bucket{self.__labels(labels, le='+Inf')} {count}")
+                lines.append(f"{full}_sum{self.__labels(labels)} {total}")
+                lines.append(f"{full}_count{self.__labels(labels)} {count}")
+
+        for name in sorted({n for n, _ in counters}):
+            full = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {full} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{full}{self.__labels(labels)} {value}")
+
+        gauges: dict[str, list[tuple[tuple, float]]] = {}
+        for fn in self.collectors:
+            try:
+                for name, labels, value in fn():
+                    gauges.setdefault(name, []).append((tuple(sorted(labels.items())), float(value)))
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        for name in sorted(gauges):
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full} gauge")
+            for labels, value in gauges[name]:
+                lines.append(f"{full}{self.__labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+# ============ Helper METHODS ============= #
+    def __labels(self, labels: tuple, le: Optional[str] = None) -> str:
+        pairs = list(labels) + ([("le", le)] if le is not None else [])
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# One registry per process, shared by main and anything it calls
+metrics = Metrics()
+
+
+class RequestTimer:
+    """
+    Plain ASGI middleware recording request_seconds{path, method, status}, timed until the last
+    body chunk is sent, so streamed responses (SSE) count their whole duration. Unlike an
+    HTTP middleware that wraps call_next, it passes receive through untouched, so
+    request.is_disconnected() keeps working inside streaming endpoints.
+    """
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            # Label by route template, not raw path, so /api/resume/{job_id} stays one series
+            route = scope.get("route")
+            self.registry.observe("request_seconds", time.perf_counter() - start,
+                                  path=getattr(route, "path", "unmatched"), method=scope["method"], status=status)
+
+        async def timed_send(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            # Client went away mid-stream or the app raised before finishing the body
+            record()
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from Utils.ragUtils import EmbGenerator
+from Utils.ragUtils.DocumentChunker import DocumentChunker
+from Utils.ragUtils.VectorIndex import normalize
+
+# Background processing of uploaded resumes:
+#   extract + chunk (process pool) -> embed chunks in batches -> store one resume embedding
+# The upload request only registers a job and returns its id; everything heavy runs on
+# these pools, never on the event loop or the executor that serves /api/matches.
+
+MAX_JOBS = 1000
+
+# ============ PARSER PROCESSES ============= #
+# Each parser process builds its own chunker once in _init_Parser, with only the tokenizer rather
+# than the whole embedding model, so jobs send nothing but a file path across the process boundary.
+_chunker: Optional[DocumentChunker] = None
+
+
+def _init_Parser(chunk_token_size: int, overlap: int) -> None:
+    global _chunker
+    _chunker = DocumentChunker(chunk_token_size=chunk_token_size, overlap=overlap,
+                               tokenizer=EmbGenerator.load_Tokenizer())
+
+
+def _chunk_File(path: str) -> list[str]:
+    return _chunker.chunk_File(path)
+
+
+def _ready() -> bool:
+    return True
+
+
+class ResumeJobs:
+    def __init__(self, db, workers: int = 2, parse_workers: int = 1,
+                 batch_size: int = EmbGenerator.DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.parse_workers = parse_workers
+        self.workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume")
+        # Created by start() from the app's startup hook, so importing main never starts processes
+        self.parsers: Optional[ProcessPoolExecutor] = None
+        self.jobs: OrderedDict[str, dict] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the parser processes. They are spawned, not forked: the pool starts its processes
+        lazily from whichever thread submits, and forking a process that already runs the
+        event loop, the embedding threads and the model is unsafe. One no-op job is run here so
+        the first process (and its tokenizer) is ready before the first upload.
+        """
+        if self.parsers is not None:
+            return
+        chunker = self.db.get_Chunker()
+        self.parsers = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_Parser,
+            initargs=(chunker.chunk_token_size, chunker.overlap),
+        )
+        self.parsers.submit(_ready).result()
+
+    def submit(self, user_id: int, data: bytes, filename: str = "resume.pdf") -> str:
+        """Register a job for this file and return its id straight away."""
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                "job_id": job_id, "user_id": user_id, "filename": filename, "state": "queued",
+                "chunks": 0, "embedded": 0, "error": None, "created": time.time(), "finished": None,
+            }
+            self.__prune()
+        self.workers.submit(self.__run, job_id, user_id, data, filename)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self) -> None:
+        self.workers.shutdown(wait=False, cancel_futures=True)
+        if self.parsers is not None:
+            self.parsers.shutdown(wait=False, cancel_futures=True)
+
+# ============ STAGES ============= #
+    def __run(self, job_id: str, user_id: int, data: bytes, filename: str) -> None:
+        try:
+            self.__update(job_id, state="extracting")
+            chunks = self.__chunk(data, filename)
+            if not chunks:
+                raise ValueError("No text could be extracted from the uploaded file.")
+            self.__update(job_id, state="embedding", chunks=len(chunks))
+
+            vectors = []
+            for start in range(0, len(chunks), self.batch_size):
+                batch = chunks[start:start + self.batch_size]
+                vectors.append(EmbGenerator.generate_Embeddings(batch, batch_size=self.batch_size))
+                self.__update(job_id, embedded=start + len(batch))
+
+            # One row per user: the resume is represented by the normalized mean of its chunks
+            embedding = normalize(np.vstack(vectors).mean(axis=0))
+            self.__update(job_id, state="saving")
+            self.db.save_Resume_Embedding(user_id, "\n".join(chunks), embedding)
+            self.__update(job_id, state="done", finished=time.time())
+        except Exception as e:
+            print(f"Failed to process resume for user ID {user_id}: {e}")
+            self.__update(job_id, state="failed", error=str(e), finished=time.time())
+
+    def __chunk(self, data: bytes, filename: str) -> list[str]:
+        suffix = ".pdf" if filename.lower().endswith(".pdf") else ".txt"
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if self.parsers is None:
+                raise RuntimeError("ResumeJobs.start() was not called.")
+            return self.parsers.submit(_chunk_File, path).result()
+        finally:
+            os.remove(path)
+
+    def __update(self, job_id: str, **fields) -> None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def __prune(self) -> None:
+        # Forget the oldest finished jobs once the table is full; running jobs are kept
+        excess = len(self.jobs) - MAX_JOBS
+        for job_id in [j for j, job in self.jobs.items() if job["finished"] is not None][:max(excess, 0)]:
+            del self.jobs[job_id]
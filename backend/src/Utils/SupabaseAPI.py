@@ -3,16 +3,50 @@ from supabase import create_client, Client
 from Utils.ragUtils import EmbGenerator
 from Utils.ragUtils import ScrapeProfs
 from Utils.ragUtils import DocumentChunker
+from Utils.ragUtils.VectorIndex import VectorIndex, to_Vector
+from Utils.ragUtils import VectorCodec
+from Utils.MatchCache import bump_Corpus_Version
 from dotenv import load_dotenv
-from typing import Optional
-import os, json, requests
+from typing import AsyncIterator, Optional
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os, json, requests, threading, asyncio, time
+from datetime import datetime, timezone
+import httpx
+import numpy as np
+
+USER_CACHE_SIZE = 10000
+# MiniLM reads at most 256 tokens, so professor text is embedded in windows that fit
+PROF_CHUNK_TOKENS = 200
+PROF_CHUNK_OVERLAP = 40
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+PROF_PAGE_SIZE = 1000
+# Queries scored per matrix product in the batch searches; bounds the (queries x chunks) score matrix
+BATCH_BLOCK_SIZE = 256
 
 class SupabaseAPI:
     supabase: Client
-    profNames: list[str]
+    profHashes: Optional[dict[str, Optional[str]]]
+    index: Optional[VectorIndex]
+    userEmbeddings: OrderedDict[int, tuple[str, np.ndarray]]
+    resumeEmbeddings: OrderedDict[int, tuple[float, Optional[np.ndarray]]]
 
-    def __init__(self):
+    def __init__(self, use_local_index: bool = False):
         self.__setup_Supabase()
+        # email -> content_hash of every professor in the table (email is the upsert key), fetched once
+        # and kept current as we upload
+        self.profHashes = None
+        # user_id -> (content_hash, embedding) for users we've already looked up
+        self.userEmbeddings = OrderedDict()
+        # user_id -> (expires, resume embedding or None) for users whose resume we've looked up
+        self.resumeEmbeddings = OrderedDict()
+        self.userLock = threading.Lock()
+        # Pooled client for calls made from the FastAPI event loop, created on first use
+        self.asyncClient: Optional[httpx.AsyncClient] = None
+        self.__setup_HTTP()
+        # Optional in-process copy of professor_embeddings; rag_Search falls back to the RPC while it is cold
+        self.index = VectorIndex() if use_local_index else None
 
     def __main__(self):
         pass
@@ -20,26 +54,256 @@ class SupabaseAPI:
 # ============ UPLOAD EMBEDDINGS TO DB ============= #
 # Uses Supabase client to upload info to the database
     def upload_prof_embedding(self, url: str):
-        self.__get_Prof_Names()
         if not url:
             raise ValueError("URL must be provided.")
         
         name, email, details = ScrapeProfs.get_professor_info(url)
-        embedding = EmbGenerator.generate_Embedding(details)
-        print(f"Generated embedding for professor {name}.")
-
-        if name in self.profNames:
-            print(f"Professor {name} already exists in the database. Skipping upload.")
+        if not self.filter_Changed_Professors([(name, email, details)]):
+            print(f"Professor {name} is unchanged in the database. Skipping upload.")
             return
-        prof_id = self.__upsert_professor(name=name, email=email, research_areas=details)
-        self.__insert_professor_embedding(professor_id=prof_id, embedding=embedding, chunk=details)
-        print(f"Successfully uploaded embeddings to VDB for prof: {name}.")
+        embedded = self.embed_Professors([(name, email, details)])
+        print(f"Generated {len(embedded[0][0])} chunk embeddings for professor {name}.")
+        self.upload_professors_batch([(name, email, details)], embedded)
+
+    def upload_prof_embeddings(self, urls: list[str], batch_size: int = EmbGenerator.DEFAULT_BATCH_SIZE) -> int:
+        """
+        Bulk version of upload_prof_embedding: scrape every url, embed all new or changed
+        professors in batched forward passes, then write them. Returns the number uploaded.
+        """
+        scraped: list[tuple[str, str, str]] = []
+        for url in urls:
+            try:
+                scraped.append(ScrapeProfs.get_professor_info(url))
+            except Exception as e:
+                print(f"Failed to scrape professor at {url}. Error: {e}")
+
+        changed = self.filter_Changed_Professors(scraped)
+        if not changed:
+            return 0
+
+        embedded = self.embed_Professors(changed, batch_size=batch_size)
+        print(f"Generated embeddings for {len(changed)} professors.")
+        return self.upload_professors_batch(changed, embedded)
+
+    def embed_Professors(self, profs: list[tuple[str, str, str]],
+                         batch_size: int = EmbGenerator.DEFAULT_BATCH_SIZE) -> list[tuple[list[str], np.ndarray]]:
+        """
+        Split each professor's details into token windows and embed every chunk of every
+        professor in one batched pass. Returns (chunks, vectors) per professor, in order.
+        """
+        chunker = self.get_Chunker()
+        chunked = [chunker.chunk_text(details) or [details] for _, _, details in profs]
+        vectors = EmbGenerator.generate_Embeddings([c for chunks in chunked for c in chunks], batch_size=batch_size)
+
+        embedded = []
+        pos = 0
+        for chunks in chunked:
+            embedded.append((chunks, vectors[pos:pos + len(chunks)]))
+            pos += len(chunks)
+        return embedded
+
+    def filter_Changed_Professors(self, profs: list[tuple[str, str, str]]) -> list[tuple[str, str, str]]:
+        """
+        Keep only professors that are new or whose details text hashes differently from
+        what is stored, so unchanged pages never reach the model.
+        """
+        self.__ensure_Prof_Hashes()
+        changed = []
+        for name, email, details in profs:
+            if self.profHashes.get(email) == EmbGenerator.content_Hash(details):
+                print(f"Professor {name} is unchanged in the database. Skipping upload.")
+                continue
+            changed.append((name, email, details))
+        return changed
+
+    def upload_professors_batch(self, profs: list[tuple[str, str, str]], embedded: list[tuple[list[str], np.ndarray]]) -> int:
+        """
+        Write professors with the (chunks, vectors) from embed_Professors: one bulk upsert into
+        professors, then their old professor_embeddings rows are replaced with one row per chunk.
+        content_hash is written last, so a batch that fails part way is re-embedded next run.
+        Returns the number of professors written.
+        """
+        self.__ensure_Prof_Hashes()
+        rows: dict[str, tuple[str, str, str, tuple[list[str], np.ndarray]]] = {}
+        for (name, email, details), embedding in zip(profs, embedded):
+            content_hash = EmbGenerator.content_Hash(details)
+            if self.profHashes.get(email) == content_hash:
+                print(f"Professor {name} is unchanged in the database. Skipping upload.")
+                continue
+            # A single upsert statement can't touch the same email twice
+            if email in rows:
+                print(f"Professor {name} shares email {email} with another professor in this batch. Skipping upload.")
+                continue
+            rows[email] = (name, details, content_hash, embedding)
+        if not rows:
+            return 0
+
+        resp = self.supabase.table("professors").upsert(
+            [{"name": name, "email": email, "research_areas": details}
+             for email, (name, details, _, _) in rows.items()],
+            on_conflict="email",
+        ).execute()
+        ids = {record["email"]: record["id"] for record in resp.data}
+
+        # New chunk rows go in before the old ones are dropped, so a failure in between leaves
+        # extra rows (cleaned up by the retry) rather than a professor with no vectors
+        inserted = self.supabase.table("professor_embeddings").insert([
+            {"professor_id": ids[email], "embedding": VectorCodec.to_Pgvector(vector), "chunk": chunk}
+            for email, (_, _, _, (chunks, vectors)) in rows.items()
+            for chunk, vector in zip(chunks, vectors)
+        ]).execute()
+        if inserted.data:
+            # ids are serial, so everything older than this insert was built from the old text
+            first_new = min(record["id"] for record in inserted.data)
+            (self.supabase.table("professor_embeddings").delete()
+             .in_("professor_id", list(ids.values())).lt("id", first_new).execute())
+        else:
+            self.supabase.table("professor_embeddings").delete().in_("professor_id", list(ids.values())).execute()
+
+        # updated_at is what get_Corpus_Version reads, so it moves only once the new vectors are in
+        updated_at = datetime.now(timezone.utc).isoformat()
+        self.supabase.table("professors").upsert(
+            [{"name": name, "email": email, "research_areas": details, "content_hash": content_hash,
+              "updated_at": updated_at}
+             for email, (name, details, content_hash, _) in rows.items()],
+            on_conflict="email",
+        ).execute()
+
+        for email, (name, details, content_hash, (chunks, vectors)) in rows.items():
+            self.profHashes[email] = content_hash
+            if self.index is not None and self.index.is_Ready():
+                self.index.remove_Professor(ids[email])
+                self.index.add(professor_id=ids[email], name=name, email=email, details=details,
+                               embeddings=vectors, chunks=chunks)
+        # Cached match rankings were computed against the old vectors
+        bump_Corpus_Version()
+        print(f"Successfully uploaded embeddings to VDB for {len(rows)} professors.")
+        return len(rows)
+
+    def get_Corpus_Version(self) -> str:
+        """
+        Latest professors.updated_at. Every upload_professors_batch moves it, so API processes
+        without a shared Redis can still tell when ingestion changed the corpus.
+        """
+        resp = (self.supabase.table("professors").select("updated_at")
+                .not_.is_("updated_at", "null").order("updated_at", desc=True).limit(1).execute())
+        return resp.data[0]["updated_at"] if resp.data else ""
         
     def upload_user_embedding(self, user_id: int, user_bio: str):
         embedding = EmbGenerator.generate_Embedding(user_bio)
         print(f"Generated embedding for user ID {user_id}.")
-        self.__insert_user_enbedding(user_id=user_id, embedding=embedding)
+        self.save_User_Embedding(user_id, user_bio, embedding)
         print(f"Successfully uploaded user embedding to VDB for user ID: {user_id}.")
+
+# ============ USER EMBEDDINGS ============= #
+# Stored vectors carry a hash of the text they were built from, so a returning user
+# with unchanged interests never goes through the model.
+    def get_User_Embedding(self, user_id: int, interests: str) -> np.ndarray:
+        embedding = self.find_User_Embedding(user_id, interests)
+        if embedding is not None:
+            return embedding
+        embedding = EmbGenerator.generate_Embedding(interests)
+        try:
+            self.save_User_Embedding(user_id, interests, embedding)
+        except Exception as e:
+            print(f"Failed to store embedding for user ID {user_id}: {e}")
+        return embedding
+
+    def find_User_Embedding(self, user_id: int, interests: str) -> Optional[np.ndarray]:
+        content_hash = EmbGenerator.content_Hash(interests)
+
+        with self.userLock:
+            cached = self.userEmbeddings.get(user_id)
+            if cached is not None and cached[0] == content_hash:
+                self.userEmbeddings.move_to_end(user_id)
+                return cached[1]
+
+        try:
+            resp = (
+                self.supabase.table("user_embeddings")
+                .select("embedding, content_hash")
+                .eq("user_id", user_id)
+                .limit(1)
+                .execute()
+            )
+        except Exception as e:
+            print(f"Failed to look up embedding for user ID {user_id}: {e}")
+            return None
+
+        if not resp.data or resp.data[0].get("content_hash") != content_hash:
+            return None
+        embedding = to_Vector(resp.data[0]["embedding"])
+        self.__remember_User_Embedding(user_id, content_hash, embedding)
+        return embedding
+
+    def get_User_Embeddings(self, user_ids: list[int], use_resume: bool = False) -> dict[int, np.ndarray]:
+        """
+        Stored embeddings for many users, one query per table. The interests embedding wins unless
+        use_resume is set; either way a user with only one of the two gets that one. Users with
+        neither are left out.
+        """
+        if not user_ids:
+            return {}
+        ids = list(dict.fromkeys(user_ids))
+        found = {}
+        # Later tables overwrite earlier ones
+        tables = ("user_embeddings", "resume_embeddings") if use_resume else ("resume_embeddings", "user_embeddings")
+        for table in tables:
+            resp = self.supabase.table(table).select("user_id, embedding").in_("user_id", ids).execute()
+            found.update((row["user_id"], to_Vector(row["embedding"])) for row in resp.data or [])
+        return found
+
+    def embed_Interests(self, interests: list[str]) -> np.ndarray:
+        """
+        (len(interests), dim) query embeddings. Texts already in the query cache skip the model;
+        the rest go through one generate_Embeddings call.
+        """
+        cache = EmbGenerator.get_Cache()
+        found = {text: cache.get(text) for text in dict.fromkeys(interests)}
+        missing = [text for text, vec in found.items() if vec is None]
+        if missing:
+            for text, vec in zip(missing, EmbGenerator.generate_Embeddings(missing)):
+                found[text] = cache.put(text, vec)
+        if not interests:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([found[text] for text in interests])
+
+    def save_User_Embedding(self, user_id: int, interests: str, embedding) -> None:
+        content_hash = EmbGenerator.content_Hash(interests)
+        self.__insert_user_enbedding(user_id=user_id, embedding=embedding, content_hash=content_hash)
+        self.__remember_User_Embedding(user_id, content_hash, to_Vector(embedding))
+
+# ============ RESUME EMBEDDINGS ============= #
+# Kept apart from user_embeddings: those are keyed on the interests text of each request, and a
+# resume stored there would be overwritten by the next /api/matches call.
+    def find_Resume_Embedding(self, user_id: int) -> Optional[np.ndarray]:
+        with self.userLock:
+            cached = self.resumeEmbeddings.get(user_id)
+            if cached is not None and cached[0] >= time.monotonic():
+                self.resumeEmbeddings.move_to_end(user_id)
+                return cached[1]
+
+        try:
+            resp = (
+                self.supabase.table("resume_embeddings")
+                .select("embedding")
+                .eq("user_id", user_id)
+                .limit(1)
+                .execute()
+            )
+        except Exception as e:
+            print(f"Failed to look up resume embedding for user ID {user_id}: {e}")
+            return None
+
+        embedding = to_Vector(resp.data[0]["embedding"]) if resp.data else None
+        self.__remember_Resume_Embedding(user_id, embedding)
+        return embedding
+
+    def save_Resume_Embedding(self, user_id: int, resume_text: str, embedding) -> None:
+        self.supabase.table("resume_embeddings").upsert({"user_id": user_id, "embedding":
+        VectorCodec.to_Pgvector(embedding), "content_hash": EmbGenerator.content_Hash(resume_text)},
+        on_conflict="user_id").execute()
+        self.__remember_Resume_Embedding(user_id, to_Vector(embedding))
     
         
     def __setup_Supabase(self)-> None:
@@ -51,95 +315,217 @@ class SupabaseAPI:
             raise RuntimeError("Set SUPABASE_URL and SUPABASE_ANON_KEY in your environment.")
         
         self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-        docChunker = DocumentChunker.DocumentChunker(chunk_token_size=500, overlap=100)
+
+        # Read once here; every RPC call reuses these instead of reloading the environment
+        self.url = SUPABASE_URL
+        self.rpcHeaders = {
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        self.poolSize = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+        self.timeout = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+        self.retries = int(os.getenv("SUPABASE_RETRIES", "3"))
+        self.backoff = float(os.getenv("SUPABASE_BACKOFF", "0.2"))
+        # How long a resume lookup (including "this user has none") is trusted before asking again
+        self.resumeTTL = float(os.getenv("RESUME_CACHE_TTL", "60"))
+        # How chunk scores become one professor score: best chunk ("max") or mean of the top m ("mean")
+        self.aggregate = os.getenv("MATCH_AGGREGATE", "max")
+        self.aggregateTopM = int(os.getenv("MATCH_AGGREGATE_TOP_M", "3"))
+        # Built on first use: it needs the embedding model's tokenizer
+        self.docChunker: Optional[DocumentChunker.DocumentChunker] = None
 
 
-    def __upsert_professor(self, name: str, email: str, department: Optional[str], research_areas: Optional[str]) -> int:
-        payload = {"name": name, "email": email}
-        if department is not None:
-            payload["department"] = department
-        if research_areas is not None:
-            payload["research_areas"] = research_areas
-        self.supabase.table("professors").upsert(payload, on_conflict="email").execute()
-        resp = self.supabase.table("professors").select("id").eq("email", email).single().execute()
-        return resp.data["id"]
+    def __insert_user_enbedding(self, user_id: int, embedding, content_hash: Optional[str] = None) -> None:
+        # One row per user, replaced in place so a failed write never leaves the user without one
+        self.supabase.table("user_embeddings").upsert({"user_id": user_id, "embedding":
+        VectorCodec.to_Pgvector(embedding), "content_hash": content_hash}, on_conflict="user_id").execute()
 
-    def __insert_professor_embedding(self, professor_id: int, embedding: list[float], chunk: str) -> None:
-        self.supabase.table("professor_embeddings").insert({"professor_id": professor_id, "embedding": embedding, "chunk": chunk}).execute()
+    def __remember_User_Embedding(self, user_id: int, content_hash: str, embedding: np.ndarray) -> None:
+        with self.userLock:
+            self.userEmbeddings[user_id] = (content_hash, embedding)
+            self.userEmbeddings.move_to_end(user_id)
+            while len(self.userEmbeddings) > USER_CACHE_SIZE:
+                self.userEmbeddings.popitem(last=False)
 
-    def __insert_user_enbedding(self, user_id: int, embedding: list[float]) -> None:
-        self.supabase.table("user_embeddings").insert({"user_id": user_id, "embedding": 
-        embedding}).execute()
+    def __remember_Resume_Embedding(self, user_id: int, embedding: Optional[np.ndarray]) -> None:
+        with self.userLock:
+            self.resumeEmbeddings[user_id] = (time.monotonic() + self.resumeTTL, embedding)
+            self.resumeEmbeddings.move_to_end(user_id)
+            while len(self.resumeEmbeddings) > USER_CACHE_SIZE:
+                self.resumeEmbeddings.popitem(last=False)
 
 # ============ Get Data From DB ============= #
 # Uses Request to call Supabase functions
-    def rag_Search(self, embedding: list[float], match_count: int = 5) -> list[dict]:
-        results = self.__get_DB_Vectors(embedding)
-        if len(results) < match_count:
-            return results
+    def load_Index(self) -> int:
+        if self.index is None:
+            self.index = VectorIndex()
+        count = self.index.load_From_DB(self.supabase)
+        print(f"Loaded {count} professor embeddings into the local index.")
+        return count
+
+    def rag_Search(self, embedding: list[float], match_count: int = 5, match_threshold: Optional[float] = None,
+                   department: Optional[str] = None, require_email: bool = False) -> list[dict]:
+        if self.index is not None and self.index.is_Ready():
+            return self.index.search(embedding, match_count, match_threshold=match_threshold,
+                                     department=department, require_email=require_email,
+                                     aggregate=self.aggregate, top_m=self.aggregateTopM)
+        results = self.__get_DB_Vectors(embedding, match_count, match_threshold, department, require_email)
         return results[:match_count]
-    
-    def __get_DB_Vectors(self, embedding: list[float]) -> list[dict]:
-        load_dotenv()
-        SUPABASE_URL = os.getenv("DATABASE_URL")
-        SUPABASE_KEY = os.getenv("SUPABASE_PUBLIC")
 
-        endpoint = f"{SUPABASE_URL}/rest/v1/rpc/top_professor_matches" #top_professor_matches = function name in supabase
+    async def rag_Search_Async(self, embedding: list[float], match_count: int = 5, match_threshold: Optional[float] = None,
+                               department: Optional[str] = None, require_email: bool = False) -> list[dict]:
+        """Same as rag_Search but the RPC goes through the pooled async client instead of blocking the event loop."""
+        if self.index is not None and self.index.is_Ready():
+            return self.index.search(embedding, match_count, match_threshold=match_threshold,
+                                     department=department, require_email=require_email,
+                                     aggregate=self.aggregate, top_m=self.aggregateTopM)
+        payload = self.__match_Payload(embedding, match_count, match_threshold, department, require_email)
+        results = await self.__post_RPC_Async("top_professor_matches", payload)
+        return results[:match_count]
 
-        headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+    async def rag_Search_Batch_Async(self, embeddings, match_count: int = 5, match_threshold: Optional[float] = None,
+                                     department: Optional[str] = None, require_email: bool = False,
+                                     block_size: int = BATCH_BLOCK_SIZE) -> AsyncIterator[tuple[int, list[dict]]]:
+        """
+        rag_Search for every row of an (n, dim) matrix, yielding (row, matches). With the local index
+        each block of rows is one matrix product against every chunk, scored off the event loop and
+        returned in order; without it each row is one RPC, poolSize at a time, returned as they finish.
+        """
+        embeddings = to_Vector(embeddings)
+        if self.index is not None and self.index.is_Ready():
+            for start in range(0, len(embeddings), block_size):
+                results = await asyncio.to_thread(
+                    self.index.search_Batch, embeddings[start:start + block_size], match_count,
+                    match_threshold=match_threshold, department=department, require_email=require_email,
+                    aggregate=self.aggregate, top_m=self.aggregateTopM)
+                for offset, matches in enumerate(results):
+                    yield start + offset, matches
+            return
 
-        payload = {
-            "user_embedding": [float(x) for x in embedding]
+        sem = asyncio.Semaphore(self.poolSize)
+
+        async def one(row: int) -> tuple[int, list[dict]]:
+            async with sem:
+                payload = self.__match_Payload(embeddings[row], match_count, match_threshold, department, require_email)
+                return row, (await self.__post_RPC_Async("top_professor_matches", payload))[:match_count]
+
+        tasks = [asyncio.create_task(one(row)) for row in range(len(embeddings))]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            # The consumer may stop early (client went away); don't leave RPCs running
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        if self.asyncClient is not None:
+            await self.asyncClient.aclose()
+            self.asyncClient = None
+        self.session.close()
+    
+    def __get_DB_Vectors(self, embedding: list[float], match_count: int, match_threshold: Optional[float] = None,
+                         department: Optional[str] = None, require_email: bool = False) -> list[dict]:
+        payload = self.__match_Payload(embedding, match_count, match_threshold, department, require_email)
+        return self.__post_RPC("top_professor_matches", payload) #top_professor_matches = function name in supabase
+
+    def __match_Payload(self, embedding: list[float], match_count: int, match_threshold: Optional[float],
+                        department: Optional[str], require_email: bool) -> dict:
+        # Limit and filters are applied inside the SQL function (see ragUtils/top_professor_matches.sql)
+        return {
+            "user_embedding": to_Vector(embedding),
+            "match_count": match_count,
+            "match_threshold": match_threshold,
+            "filter_department": department,
+            "require_email": require_email,
+            "aggregate": self.aggregate,
+            "top_m": self.aggregateTopM,
         }
 
-        r = requests.post(endpoint, headers=headers, data=json.dumps(payload)) #use requests to post data to supabase function
+# ============ RPC TRANSPORT ============= #
+# One keep-alive pool per process for each of sync (requests) and async (httpx) callers
+    def __setup_HTTP(self) -> None:
+        self.session = requests.Session()
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "POST"]),
+        )
+        adapter = HTTPAdapter(pool_connections=self.poolSize, pool_maxsize=self.poolSize, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.rpcHeaders)
+
+    def __get_Async_Client(self) -> httpx.AsyncClient:
+        if self.asyncClient is None:
+            self.asyncClient = httpx.AsyncClient(
+                headers=self.rpcHeaders,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.poolSize, max_keepalive_connections=self.poolSize),
+            )
+        return self.asyncClient
+
+    def __post_RPC(self, function: str, payload: dict) -> list[dict]:
+        r = self.session.post(f"{self.url}/rest/v1/rpc/{function}", data=VectorCodec.dumps(payload), timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
 
-        data = r.json()
-        return data
+    async def __post_RPC_Async(self, function: str, payload: dict) -> list[dict]:
+        client = self.__get_Async_Client()
+        endpoint = f"{self.url}/rest/v1/rpc/{function}"
+        body = VectorCodec.dumps(payload)
+        for attempt in range(self.retries + 1):
+            try:
+                r = await client.post(endpoint, content=body)
+                if r.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    r.raise_for_status()
+                    return r.json()
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt))
     
     def __get_Num_Embeddings(self) -> int:
-        url = os.getenv("DATABASE_URL")  
-        key = os.getenv("SUPABASE_PUBLIC")
-        r = requests.post(
-            f"{url}/rest/v1/rpc/debug_count_embeddings",
-            headers={
-                "apikey": key,
-                "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
-            data=json.dumps({})  # no args
-        )
+        r = self.session.post(f"{self.url}/rest/v1/rpc/debug_count_embeddings", data=json.dumps({}), timeout=self.timeout)  # no args
 
         print("status", r.status_code)
         print("body", r.text)
 
     def __debug_get_DB_Role(self) -> str:
-        url = os.getenv("DATABASE_URL")  
-        key = os.getenv("SUPABASE_PUBLIC")
-        r = requests.post(
-            f"{url}/rest/v1/rpc/debug_whoami",
-            headers={
-                "apikey": key,
-                "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
-            data=json.dumps({})  # no args
-        )
+        r = self.session.post(f"{self.url}/rest/v1/rpc/debug_whoami", data=json.dumps({}), timeout=self.timeout)  # no args
 
         print("status", r.status_code)
         print("body", r.text)
 
 
-    def __get_Prof_Names(self) -> None:
-        resp = self.supabase.table("professors").select("name").execute()
-        self.profNames = [record["name"] for record in resp.data]
+    def __get_Prof_Hashes(self) -> None:
+        # Keyset pages in id order; one unpaged select would be cut off at PostgREST's max-rows
+        hashes: dict[str, Optional[str]] = {}
+        last_id = None
+        while True:
+            query = self.supabase.table("professors").select("id, email, content_hash").order("id").limit(PROF_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = query.execute().data or []
+            if not page:
+                break
+            hashes.update((record["email"], record.get("content_hash")) for record in page)
+            last_id = page[-1]["id"]
+        self.profHashes = hashes
+
+    def get_Chunker(self) -> DocumentChunker.DocumentChunker:
+        if self.docChunker is None:
+            self.docChunker = DocumentChunker.DocumentChunker(
+                chunk_token_size=PROF_CHUNK_TOKENS, overlap=PROF_CHUNK_OVERLAP, tokenizer=EmbGenerator.get_Tokenizer()
+            )
+        return self.docChunker
+
+    def __ensure_Prof_Hashes(self) -> None:
+        if self.profHashes is None:
+            self.__get_Prof_Hashes()
 
     
 if __name__ == "__main__":
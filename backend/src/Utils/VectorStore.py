@@ -0,0 +1,185 @@
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+
+from Utils.ragUtils import VectorCodec
+
+# Where /api/matches runs its top-k search. VECTOR_BACKEND picks one:
+#   rpc       - Supabase top_professor_matches RPC over HTTP (default)
+#   local     - in-process VectorIndex loaded at startup, RPC while it is cold
+#   postgres  - one SQL query per search on pooled async SQLAlchemy connections straight to
+#               Postgres (POSTGRES_URL), using the pgvector HNSW / IVFFlat index built by db/init_db.py
+# Every backend returns rows shaped like the RPC: professor_id, name, email, department,
+# details, best_chunk, similarity. search_Batch answers many queries at once as (row, matches)
+# pairs; with SupabaseAPI's local index loaded, a whole block of queries is one matrix product.
+
+BACKENDS = ("rpc", "local", "postgres")
+
+
+class SupabaseVectorStore:
+    """rpc / local: delegates to SupabaseAPI, which prefers its local index once it is loaded."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def search(self, embedding, match_count: int = 5, match_threshold: Optional[float] = None,
+                     department: Optional[str] = None, require_email: bool = False) -> list[dict]:
+        return await self.db.rag_Search_Async(embedding, match_count, match_threshold=match_threshold,
+                                              department=department, require_email=require_email) or []
+
+    def search_Batch(self, embeddings, match_count: int = 5, match_threshold: Optional[float] = None,
+                     department: Optional[str] = None, require_email: bool = False) -> AsyncIterator[tuple[int, list[dict]]]:
+        return self.db.rag_Search_Batch_Async(embeddings, match_count, match_threshold=match_threshold,
+                                              department=department, require_email=require_email)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class PostgresVectorStore:
+    # The ANN index answers "nearest chunks"; per-professor folding happens over that candidate
+    # set, so ask for enough chunks that k distinct professors (with top_m chunks each) survive
+    CANDIDATE_FACTOR = 4
+    MIN_CANDIDATES = 100
+    # An HNSW scan returns at most ef_search rows (pgvector caps the setting at 1000)
+    MAX_EF_SEARCH = 1000
+
+    SEARCH_SQL = """
+        with candidates as (
+            select pe.professor_id, pe.chunk, 1 - (pe.embedding <=> cast(:embedding as vector)) as sim
+            from professor_embeddings pe
+            join professors p on p.id = pe.professor_id
+            where (cast(:department as text) is null or p.department = cast(:department as text))
+              and (not cast(:require_email as boolean) or (p.email is not null and p.email <> 'N/A'))
+            order by pe.embedding <=> cast(:embedding as vector)
+            limit :candidates
+        ),
+        ranked as (
+            select c.*, row_number() over (partition by c.professor_id order by c.sim desc) as chunk_rank
+            from candidates c
+        ),
+        per_professor as (
+            select
+                professor_id,
+                case when cast(:aggregate as text) = 'mean'
+                    then avg(sim) filter (where chunk_rank <= :top_m)
+                    else max(sim)
+                end as similarity,
+                max(chunk) filter (where chunk_rank = 1) as best_chunk
+            from ranked
+            group by professor_id
+        )
+        select p.id as professor_id, p.name, p.email, p.department, p.research_areas as details,
+               pp.best_chunk, pp.similarity
+        from per_professor pp
+        join professors p on p.id = pp.professor_id
+        where cast(:match_threshold as float) is null or pp.similarity >= cast(:match_threshold as float)
+        order by pp.similarity desc
+        limit :match_count
+    """
+
+    def __init__(self, url: str, pool_size: int = 10, max_overflow: int = 5, ef_search: int = 40,
+                 ivfflat_probes: int = 10, aggregate: str = "max", top_m: int = 3):
+        from sqlalchemy import event, text
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        self.engine = create_async_engine(to_Async_URL(url), pool_size=pool_size, max_overflow=max_overflow,
+                                          pool_pre_ping=True)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.searchSQL = text(self.SEARCH_SQL)
+        self.tuneSQL = text("select set_config('hnsw.ef_search', :ef_search, true), "
+                            "set_config('ivfflat.probes', :probes, true)")
+        self.poolSize = pool_size
+        self.efSearch = int(ef_search)
+        self.probes = int(ivfflat_probes)
+        self.aggregate = aggregate
+        self.top_m = top_m
+        self.binaryVectors = False
+
+        # With pgvector's asyncpg codec, query vectors go over the wire as binary float32
+        try:
+            from pgvector.asyncpg import register_vector
+        except ImportError:
+            register_vector = None
+        if register_vector is not None and self.engine.dialect.driver == "asyncpg":
+            self.binaryVectors = True
+
+            @event.listens_for(self.engine.sync_engine, "connect")
+            def register(dbapi_connection, _):
+                dbapi_connection.run_async(register_vector)
+
+    async def search(self, embedding, match_count: int = 5, match_threshold: Optional[float] = None,
+                     department: Optional[str] = None, require_email: bool = False) -> list[dict]:
+        vec = VectorCodec.to_Array(embedding)
+        params = {
+            "embedding": vec if self.binaryVectors else VectorCodec.to_Pgvector(vec),
+            "department": department,
+            "require_email": require_email,
+            "aggregate": self.aggregate,
+            "top_m": self.top_m,
+            "match_threshold": match_threshold,
+            "match_count": match_count,
+            "candidates": max(self.MIN_CANDIDATES, match_count * max(self.top_m, 1) * self.CANDIDATE_FACTOR),
+        }
+        # The candidates limit only helps if the HNSW scan may return that many rows; the department /
+        # email filters are applied after the scan, so a smaller ef_search would cap every query
+        ef_search = min(max(self.efSearch, params["candidates"]), self.MAX_EF_SEARCH)
+        async with self.sessions() as session:
+            async with session.begin():
+                # Recall/speed trade-off of the ANN scan (whichever index init_db built); this transaction only
+                await session.execute(self.tuneSQL, {"ef_search": str(ef_search), "probes": str(self.probes)})
+                result = await session.execute(self.searchSQL, params)
+                return [dict(row) for row in result.mappings()]
+
+    async def search_Batch(self, embeddings, match_count: int = 5, match_threshold: Optional[float] = None,
+                           department: Optional[str] = None,
+                           require_email: bool = False) -> AsyncIterator[tuple[int, list[dict]]]:
+        """(row, matches) for every query row, as they finish; at most pool_size searches in flight."""
+        sem = asyncio.Semaphore(self.poolSize)
+
+        async def one(row: int, embedding) -> tuple[int, list[dict]]:
+            async with sem:
+                return row, await self.search(embedding, match_count, match_threshold=match_threshold,
+                                              department=department, require_email=require_email)
+
+        tasks = [asyncio.create_task(one(row, vec)) for row, vec in enumerate(VectorCodec.to_Array(embeddings))]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        await self.engine.dispose()
+
+
+def to_Async_URL(url: str) -> str:
+    """
+    POSTGRES_URL is shared with the sync engine in db/database.py, so it may name a sync driver
+    (postgresql+psycopg2://); the async engine always gets asyncpg.
+    """
+    scheme, sep, rest = url.partition("://")
+    if not sep or scheme.split("+", 1)[0] not in ("postgresql", "postgres"):
+        raise ValueError("POSTGRES_URL must be a postgresql:// URL.")
+    return "postgresql+asyncpg://" + rest
+
+
+def make_Vector_Store(db, backend: Optional[str] = None):
+    backend = backend or os.getenv("VECTOR_BACKEND", "rpc")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+    if backend in ("rpc", "local"):
+        return SupabaseVectorStore(db)
+
+    url = os.getenv("POSTGRES_URL")
+    if not url:
+        raise RuntimeError("Set POSTGRES_URL to use VECTOR_BACKEND=postgres.")
+    return PostgresVectorStore(
+        url,
+        pool_size=int(os.getenv("POSTGRES_POOL_SIZE", "10")),
+        ef_search=int(os.getenv("HNSW_EF_SEARCH", "40")),
+        ivfflat_probes=int(os.getenv("IVFFLAT_PROBES", "10")),
+        aggregate=os.getenv("MATCH_AGGREGATE", "max"),
+        top_m=int(os.getenv("MATCH_AGGREGATE_TOP_M", "3")),
+    )
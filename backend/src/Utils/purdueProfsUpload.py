@@ -1,20 +1,35 @@
+import argparse
 import Utils.SupabaseAPI as SupabaseAPI
+from Utils.IngestPipeline import IngestPipeline
+
+ap = argparse.ArgumentParser(description="Scrape, embed and upload every professor in a link file.")
+ap.add_argument("--links", default="Utils/data/profLinks.txt", help="Text file with one professor URL per line.")
+ap.add_argument("--checkpoint", default="Utils/data/profLinks.checkpoint.json", help="Progress file used to resume a crashed run.")
+ap.add_argument("--fetch-workers", type=int, default=8, help="Concurrent page fetches.")
+ap.add_argument("--parse-workers", type=int, default=2, help="Processes used to parse HTML.")
+ap.add_argument("--per-host", type=int, default=2, help="Max concurrent requests to one host.")
+ap.add_argument("--min-interval", type=float, default=0.5, help="Seconds between requests to the same host.")
+ap.add_argument("--batch-size", type=int, default=32, help="Professors embedded and written per batch.")
+ap.add_argument("--fresh", action="store_true", help="Ignore the checkpoint of an unfinished earlier run.")
+ap.add_argument("--validator-cache", default="Utils/data/profLinks.validators.json", help="ETag/Last-Modified store for conditional re-crawls.")
+args = ap.parse_args()
 
 links = []
-with open("Utils/data/profLinks.txt", "r") as f:
+with open(args.links, "r") as f:
     links_without_newlines = f.read().splitlines()
-    links.extend(links_without_newlines)
+    links.extend(l.strip() for l in links_without_newlines if l.strip())
     print(f"Loaded {len(links)} professor links.")
-print(len(links))
-print(links[:2])
-
-startIndex = 0
-endIndex = len(links)
 
 uploader = SupabaseAPI.SupabaseAPI()
-for i in range(startIndex, endIndex):
-    try:
-        print(f"Uploading professor {i+1}/{endIndex}: {links[i]}")
-        uploader.upload_prof_embedding(links[i])
-    except Exception as e:
-        print(f"Failed to upload professor at {links[i]}. Error: {e}")  
\ No newline at end of file
+pipeline = IngestPipeline(
+    uploader,
+    checkpoint_path=args.checkpoint,
+    fetch_workers=args.fetch_workers,
+    parse_workers=args.parse_workers,
+    per_host=args.per_host,
+    min_interval=args.min_interval,
+    batch_size=args.batch_size,
+    validator_cache_path=args.validator_cache,
+    fresh=args.fresh,
+)
+pipeline.run(links)
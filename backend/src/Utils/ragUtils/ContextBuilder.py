@@ -0,0 +1,132 @@
+import re
+from typing import Callable, Optional
+
+import numpy as np
+
+# Turns rag_Search matches into the context block of the LLM prompt:
+#   passages (best chunk per professor) -> drop near-duplicates -> re-rank -> pack into a token budget
+# so prompt prefill stays bounded no matter how long the stored professor text is.
+
+# Passages shorter than this are not worth truncating into the last bit of the budget
+MIN_PASSAGE_TOKENS = 32
+SHINGLE_SIZE = 3
+
+
+class ContextBuilder:
+    token_budget: int
+    rerank: str
+
+    def __init__(self, token_budget: int = 1500, tokenizer=None, rerank: str = "mmr", mmr_lambda: float = 0.7,
+                 dedupe_threshold: float = 0.8, embed_fn: Optional[Callable[[list[str]], np.ndarray]] = None):
+        """
+        rerank is "none" (keep similarity order), "mmr" (diversity from word overlap) or
+        "mmr-embed" (diversity from passage embeddings, via embed_fn). Without a tokenizer,
+        token counts are estimated as characters / 4.
+        """
+        if rerank not in ("none", "mmr", "mmr-embed"):
+            raise ValueError(f"Unknown rerank: {rerank}")
+        if rerank == "mmr-embed" and embed_fn is None:
+            raise ValueError("rerank='mmr-embed' needs an embed_fn.")
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer
+        self.rerank = rerank
+        self.mmr_lambda = mmr_lambda
+        self.dedupe_threshold = dedupe_threshold
+        self.embed_fn = embed_fn
+
+    def build(self, matches: list[dict]) -> str:
+        return "\n\n".join(self.select(matches))
+
+    def select(self, matches: list[dict]) -> list[str]:
+        """The formatted passages that fit the budget, most useful first."""
+        passages = self.__dedupe(self.__passages(matches))
+        if self.rerank != "none" and len(passages) > 1:
+            passages = self.__mmr(passages)
+
+        selected = []
+        remaining = self.token_budget
+        for passage in passages:
+            text = passage["text"]
+            tokens = self.count_Tokens(text)
+            if tokens > remaining:
+                if remaining < MIN_PASSAGE_TOKENS:
+                    break
+                # Leave room for the " ..." marker
+                text = self.__truncate(text, remaining - 2)
+                tokens = remaining
+            selected.append(text)
+            remaining -= tokens
+        return selected
+
+    def count_Tokens(self, text: str) -> int:
+        if self.tokenizer is None:
+            return len(text) // 4 + 1
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+# ============ Helper METHODS ============= #
+    def __passages(self, matches: list[dict]) -> list[dict]:
+        passages = []
+        for match in sorted(matches, key=lambda m: m.get("similarity") or 0.0, reverse=True):
+            body = (match.get("best_chunk") or match.get("details") or "").strip()
+            if not body:
+                continue
+            header = f"Professor {match.get('name')}"
+            email = match.get("email")
+            if email and email != "N/A":
+                header += f" ({email})"
+            passages.append({"text": f"{header}: {body}", "body": body,
+                             "similarity": float(match.get("similarity") or 0.0),
+                             "shingles": self.__shingles(body)})
+        return passages
+
+    def __dedupe(self, passages: list[dict]) -> list[dict]:
+        # Passages arrive best-first, so of two overlapping ones the better match survives
+        kept = []
+        for passage in passages:
+            if any(self.__overlap(passage, other) >= self.dedupe_threshold for other in kept):
+                continue
+            kept.append(passage)
+        return kept
+
+    def __mmr(self, passages: list[dict]) -> list[dict]:
+        """Maximal marginal relevance: trade match similarity against similarity to passages already picked."""
+        if self.rerank == "mmr-embed":
+            vectors = np.asarray(self.embed_fn([p["body"] for p in passages]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            pairwise = vectors @ vectors.T
+        else:
+            pairwise = np.array([[self.__overlap(a, b) for b in passages] for a in passages], dtype=np.float32)
+
+        relevance = np.array([p["similarity"] for p in passages], dtype=np.float32)
+        order = [int(np.argmax(relevance))]
+        redundancy = pairwise[order[0]].copy()
+        left = set(range(len(passages))) - set(order)
+        while left:
+            candidates = np.array(sorted(left))
+            scores = self.mmr_lambda * relevance[candidates] - (1 - self.mmr_lambda) * redundancy[candidates]
+            pick = int(candidates[np.argmax(scores)])
+            order.append(pick)
+            left.remove(pick)
+            redundancy = np.maximum(redundancy, pairwise[pick])
+        return [passages[i] for i in order]
+
+    def __truncate(self, text: str, max_tokens: int) -> str:
+        if self.tokenizer is None:
+            return text[:max_tokens * 4].rstrip() + " ..."
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        if len(offsets) <= max_tokens:
+            return text
+        return text[:offsets[max_tokens - 1][1]].rstrip() + " ..."
+
+    def __shingles(self, text: str) -> set[tuple[str, ...]]:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < SHINGLE_SIZE:
+            return {tuple(words)} if words else set()
+        return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    def __overlap(self, a: dict, b: dict) -> float:
+        # Containment rather than Jaccard so a chunk that sits inside a longer one counts as a duplicate
+        if not a["shingles"] or not b["shingles"]:
+            return 0.0
+        shared = len(a["shingles"] & b["shingles"])
+        return shared / min(len(a["shingles"]), len(b["shingles"]))
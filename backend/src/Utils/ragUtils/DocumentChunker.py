@@ -1,12 +1,26 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
 import PyPDF2
 
+# Plain-text files are read in blocks this size so a large file never sits in memory whole
+READ_BLOCK_CHARS = 64 * 1024
+
+
 class DocumentChunker:
     chunk_token_size: int
     overlap: int
     
-    def __init__(self, chunk_token_size=100, overlap=20):
+    def __init__(self, chunk_token_size=100, overlap=20, tokenizer=None):
+        """
+        With a (fast) Hugging Face tokenizer, chunk_token_size and overlap are counted in
+        model tokens; without one they fall back to characters.
+        """
+        if overlap >= chunk_token_size:
+            raise ValueError("overlap must be smaller than chunk_token_size.")
         self.chunk_token_size = chunk_token_size
         self.overlap = overlap
+        self.tokenizer = tokenizer
 
     def __main__(self):
         sample_text = "This is a sample text to demonstrate the chunking functionality. " * 100
@@ -15,16 +29,41 @@ class DocumentChunker:
             print(f"Chunk {i+1}:\n{chunk}\n")
 
 
-    def chunk_documents(self, document_paths: list[str]) -> list[str]:
-        chunks = []
-        for doc in document_paths:
-            if doc.lower().endswith('.pdf'):
-                text = self.__getTextFromPDF(doc)
-            else:
-                with open(doc, 'r', encoding='utf-8') as file:
-                    text = file.read()
-            chunks.append(self.chunk_text(text))
-        return chunks
+    def chunk_documents(self, document_paths: list[str], workers: int = 1) -> list[list[str]]:
+        return [chunks for _, chunks in self.iter_Documents(document_paths, workers=workers)]
+
+    def iter_Documents(self, document_paths: list[str], workers: int = 1) -> Iterator[tuple[str, list[str]]]:
+        """
+        Yield (path, chunks) one document at a time, in input order. With workers > 1 the
+        documents are chunked in a process pool; only finished documents are held in memory.
+        """
+        if workers <= 1 or len(document_paths) <= 1:
+            for doc in document_paths:
+                yield doc, list(self.iter_Chunks(doc))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from zip(document_paths, pool.map(self.chunk_File, document_paths))
+
+    def chunk_File(self, document_path: str) -> list[str]:
+        # A bound method pickles with its chunker, so this can be handed to a process pool
+        return list(self.iter_Chunks(document_path))
+
+    def iter_Chunks(self, document_path: str) -> Iterator[str]:
+        """
+        Stream one PDF / text file page by page (block by block for text) and yield the same
+        chunks chunk_text would give for the whole document. Only the current page plus an
+        overlap-sized tail is ever buffered.
+        """
+        buffer = ""
+        skip = 0
+        emitted = False
+        for piece in self.__iter_Text(document_path):
+            buffer += piece
+            chunks, buffer, skip = self.__drain(buffer, final=False, emitted=emitted, skip=skip)
+            emitted = emitted or bool(chunks)
+            yield from chunks
+        chunks, _, _ = self.__drain(buffer, final=True, emitted=emitted, skip=skip)
+        yield from chunks
     
     def chunk_documents_paragraphs(self, document_paths: list[str]) -> list[str]:
         chunks = []
@@ -41,6 +80,9 @@ class DocumentChunker:
         return chunks
     
     def chunk_text(self, text: str) -> list[str]:
+        if self.tokenizer is not None:
+            return self.__chunk_Tokens(text)
+
         chunks = []
         start = 0
         text_length = len(text)
@@ -53,13 +95,91 @@ class DocumentChunker:
 
         return chunks
     
+    def __chunk_Tokens(self, text: str) -> list[str]:
+        # Window over token offsets and cut the original text at token boundaries
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        chunks = []
+        step = self.chunk_token_size - self.overlap
+        for start in range(0, len(offsets), step):
+            window = offsets[start:start + self.chunk_token_size]
+            chunk = text[window[0][0]:window[-1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            if start + self.chunk_token_size >= len(offsets):
+                break
+        return chunks
+
+    def __drain(self, buffer: str, final: bool, emitted: bool, skip: int = 0) -> tuple[list[str], str, int]:
+        """
+        Cut every complete window out of buffer and return (chunks, rest, skip). rest carries
+        exactly the overlap into the next page: it starts at the next window's first unit, or in
+        token mode at the start of that unit's word, with skip characters to pass over before
+        the window begins. Re-tokenizing from a word start gives the same WordPiece split as the
+        whole text would, where starting mid-word would turn a "##" piece into a new word.
+        With final=True the partial last window is emitted as well.
+        """
+        size = self.chunk_token_size
+        step = size - self.overlap
+        chunks = []
+        if self.tokenizer is None:
+            start = 0
+            while len(buffer) - start >= size or (final and start < len(buffer)):
+                chunks.append(buffer[start:start + size])
+                start += step
+            return chunks, buffer[start:], 0
+
+        offsets = self.tokenizer(buffer, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        # Tokens of the carried word that the previous window already moved past
+        offsets = [o for o in offsets if o[0] >= skip]
+        complete = len(offsets)
+        if not final:
+            # Until the input ends, the text after the last whitespace may be a word cut off at the
+            # block boundary, already split into several pieces; hold all of it back
+            tail = len(buffer)
+            while tail > 0 and not buffer[tail - 1].isspace():
+                tail -= 1
+            while complete > 0 and offsets[complete - 1][0] >= tail:
+                complete -= 1
+        start = 0
+        while complete - start >= size:
+            window = offsets[start:start + size]
+            chunk = buffer[window[0][0]:window[-1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            start += step
+        if final:
+            # The tail is only new text if it runs past the overlap already sent with the last window
+            if start < len(offsets) and (not (emitted or chunks) or len(offsets) - start > self.overlap):
+                chunk = buffer[offsets[start][0]:offsets[-1][1]].strip()
+                if chunk:
+                    chunks.append(chunk)
+            return chunks, "", 0
+        if start >= len(offsets):
+            return chunks, "", 0
+        cut = word = offsets[start][0]
+        while word > 0 and not buffer[word - 1].isspace():
+            word -= 1
+        return chunks, buffer[word:], cut - word
+
+    def __iter_Text(self, path: str) -> Iterator[str]:
+        if path.lower().endswith('.pdf'):
+            with open(path, "rb") as file:
+                reader = PyPDF2.PdfReader(file)
+                for page in reader.pages:
+                    yield (page.extract_text() or "") + "\n"
+        else:
+            with open(path, 'r', encoding='utf-8') as file:
+                while True:
+                    block = file.read(READ_BLOCK_CHARS)
+                    if not block:
+                        break
+                    yield block
+
     def __getTextFromPDF(self, pdf_path):
-        text = ""
         with open(pdf_path, "rb") as file:
             reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+            return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
+
 if __name__ == "__main__":
     doc_chunker = DocumentChunker()
     doc_chunker.__main__()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+import numpy as np
+
+from Utils.ragUtils import EmbGenerator
+
+# Coalesces concurrent single-text embedding requests into one batched forward pass.
+# Callers await embed(text); a background task drains the queue, waiting at most
+# max_wait_ms (or until max_batch_size texts are queued) before running the model.
+# Everything that can block (the model, SQLite reads/writes of the cache) runs on the executor.
+
+
+class EmbeddingBatcher:
+    max_batch_size: int
+    max_wait_ms: float
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0, executor: Optional[Executor] = None,
+                 embed_fn: Callable[[list[str]], np.ndarray] = EmbGenerator.generate_Embeddings):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self.embed_fn = embed_fn
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def start(self) -> None:
+        if self.worker is None or self.worker.done():
+            # Requests already queued when a worker died are picked up by the new one
+            if self.queue is None:
+                self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        cache = EmbGenerator.get_Cache()
+        cached = cache.get_Memory(text)
+        if cached is None and cache.has_Disk():
+            cached = await asyncio.get_running_loop().run_in_executor(self.executor, cache.get, text)
+        if cached is not None:
+            return cached
+
+        if self.worker is None or self.worker.done():
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+# ============ Helper METHODS ============= #
+    async def __run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self.__embed_Batch(batch)
+            except Exception as e:
+                # Never let one bad batch kill the worker: every later request would hang
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def __embed_Batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        # Identical texts in the same window share one slot in the forward pass
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        loop = asyncio.get_running_loop()
+        by_text = await loop.run_in_executor(self.executor, self.__embed_And_Cache, texts)
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def __embed_And_Cache(self, texts: list[str]) -> dict[str, np.ndarray]:
+        vectors = self.embed_fn(texts)
+        cache = EmbGenerator.get_Cache()
+        by_text = {}
+        for text, vec in zip(texts, vectors):
+            try:
+                by_text[text] = cache.put(text, vec)
+            except Exception as e:
+                # e.g. "database is locked" on a shared EMBEDDING_CACHE_PATH; the vector is still good
+                print(f"Failed to cache embedding: {e}")
+                by_text[text] = np.asarray(vec, dtype=np.float32)
+        return by_text
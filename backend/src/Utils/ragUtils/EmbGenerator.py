@@ -1,22 +1,125 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+import numpy as np
+import threading
 import json
+import os
+from Utils.ragUtils.EmbeddingCache import EmbeddingCache, hash_Text
 
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 32
+
+# EMBEDDING_BACKEND picks the runtime the model runs under:
+#   torch     - default sentence-transformers / PyTorch model
+#   onnx      - ONNX Runtime export of the same weights
+#   onnx-int8 - ONNX Runtime with the int8-quantized export (EMBEDDING_ONNX_FILE overrides the file)
+#   openvino  - OpenVINO runtime
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+# One model per process, created on first use (or by warm_Up) instead of at import
+_embedding_model = None
+_model_lock = threading.Lock()
+
+# Query cache for generate_Embedding. EMBEDDING_CACHE_PATH enables the SQLite spill file.
+_embedding_cache = None
+_cache_lock = threading.Lock()
+
+def get_Model():
+    global _embedding_model
+    if _embedding_model is None:
+        with _model_lock:
+            if _embedding_model is None:
+                _embedding_model = _load_Model(os.getenv("EMBEDDING_BACKEND", "torch"))
+    return _embedding_model
+
+def get_Cache() -> EmbeddingCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+                    path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+                    namespace=f"{MODEL_NAME}:{os.getenv('EMBEDDING_BACKEND', 'torch')}",
+                )
+    return _embedding_cache
+
+def content_Hash(text: str) -> str:
+    """Hash stored next to a vector to tell whether the text it was built from has changed."""
+    return hash_Text(text, namespace=MODEL_NAME)
+
+def get_Tokenizer():
+    """The embedding model's own tokenizer, so chunk sizes match what the model actually sees."""
+    return get_Model()._client.tokenizer
+
+def load_Tokenizer():
+    """Only the model's tokenizer, for processes that chunk text but never embed it."""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(MODEL_NAME)
+
+def get_Max_Tokens() -> int:
+    return get_Model()._client.max_seq_length
+
+def warm_Up() -> None:
+    """Load the model and run one forward pass so the first request doesn't pay for it."""
+    get_Model().embed_query("warm up")
+
+def _load_Model(backend: str):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    model_kwargs = {}
+    if backend == "onnx":
+        model_kwargs = {"backend": "onnx"}
+    elif backend == "onnx-int8":
+        file_name = os.getenv("EMBEDDING_ONNX_FILE", ONNX_INT8_FILE)
+        model_kwargs = {"backend": "onnx", "model_kwargs": {"file_name": file_name}}
+    elif backend == "openvino":
+        model_kwargs = {"backend": "openvino"}
+    elif backend != "torch":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+    print(f"Loading embedding model {MODEL_NAME} ({backend}).")
+    return HuggingFaceEmbeddings(model_name=MODEL_NAME, model_kwargs=model_kwargs)
+
+def generate_Embeddings(chunks: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    """
+    Embed many texts with batched forward passes. Texts are sorted by length so each
+    batch pads to a similar length, then results are put back in input order.
+    Returns a (len(chunks), dim) float32 array.
+    """
+    if not chunks:
+        return np.empty((0, 0), dtype=np.float32)
+
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    embeddings: np.ndarray | None = None
+
+    for start in range(0, len(order), batch_size):
+        batch_ids = order[start:start + batch_size]
+        batch = np.asarray(get_Model().embed_documents([chunks[i] for i in batch_ids]), dtype=np.float32)
+        if embeddings is None:
+            embeddings = np.empty((len(chunks), batch.shape[1]), dtype=np.float32)
+        embeddings[batch_ids] = batch
 
-def generate_Embeddings(chunks: list[str]) -> list[list[float]]:
-    embeddings = []
-    for i in chunks:
-        embeddings = generate_Embedding(i)
     return embeddings
 
-def generate_Embedding(text: str) -> list[float]:
-    embedding = embedding_model.embed_query(text)
-    return embedding
+def generate_Embedding(text: str, use_cache: bool = True) -> np.ndarray:
+    """
+    Embed a single query as a float32 vector. Lookups are keyed on whitespace/case-normalized
+    text, which the uncased MiniLM tokenizer treats identically anyway.
+    """
+    if not use_cache:
+        return np.asarray(get_Model().embed_query(text), dtype=np.float32)
 
-def writeEmbeddingsToFile(embeddings: list[list[float]], file_path: str):
+    cache = get_Cache()
+    cached = cache.get(text)
+    if cached is not None:
+        return cached
+    return cache.put(text, get_Model().embed_query(text))
+
+def writeEmbeddingsToFile(embeddings: list[list[float]] | np.ndarray, file_path: str):
+    if isinstance(embeddings, np.ndarray):
+        embeddings = embeddings.tolist()
     with open(file_path, 'w') as f:
         json.dump(embeddings, f)
 
-test_text = "This is a sample text for generating embeddings."
-print(len(generate_Embedding(test_text)))
-
+if __name__ == "__main__":
+    test_text = "This is a sample text for generating embeddings."
+    print(len(generate_Embedding(test_text)))
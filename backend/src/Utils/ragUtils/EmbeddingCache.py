@@ -0,0 +1,135 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Content-addressed cache in front of the embedding model. Keys are a hash of the
+# normalized text, values are float32 vectors. Memory is an LRU with a size bound;
+# an optional SQLite file keeps entries across restarts.
+
+WS_RE = re.compile(r"\s+")
+
+
+def normalize_Text(text: str) -> str:
+    return WS_RE.sub(" ", text or "").strip().lower()
+
+
+def hash_Text(text: str, namespace: str = "") -> str:
+    return hashlib.sha256(f"{namespace}\0{normalize_Text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    max_size: int
+    namespace: str
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 10000, path: Optional[str] = None, namespace: str = ""):
+        """
+        namespace should identify the model/backend so vectors from a different model
+        stored in the same file are never returned.
+        """
+        self.max_size = max_size
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.lock = threading.Lock()
+        self.db: Optional[sqlite3.Connection] = None
+        if path:
+            self.__open_Disk(path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+# ============ LOOKUP / STORE ============= #
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = hash_Text(text, self.namespace)
+        with self.lock:
+            vec = self.entries.get(key)
+            if vec is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return vec
+
+            vec = self.__read_Disk(key)
+            if vec is not None:
+                self.__remember(key, vec)
+                self.hits += 1
+                return vec
+
+            self.misses += 1
+            return None
+
+    def get_Memory(self, text: str) -> Optional[np.ndarray]:
+        """get() without the disk tier, safe to call from an event loop."""
+        key = hash_Text(text, self.namespace)
+        with self.lock:
+            vec = self.entries.get(key)
+            if vec is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            elif self.db is None:
+                # No disk tier to consult, so this is the final answer
+                self.misses += 1
+            return vec
+
+    def has_Disk(self) -> bool:
+        return self.db is not None
+
+    def put(self, text: str, embedding) -> np.ndarray:
+        key = hash_Text(text, self.namespace)
+        vec = np.asarray(embedding, dtype=np.float32)
+        with self.lock:
+            self.__remember(key, vec)
+            self.__write_Disk(key, vec)
+        return vec
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM embeddings")
+                self.db.commit()
+
+# ============ Helper METHODS ============= #
+    def __remember(self, key: str, vec: np.ndarray) -> None:
+        self.entries[key] = vec
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __open_Disk(self, path: str) -> None:
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self.db.commit()
+
+    def __read_Disk(self, key: str) -> Optional[np.ndarray]:
+        if self.db is None:
+            return None
+        row = self.db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def __write_Disk(self, key: str, vec: np.ndarray) -> None:
+        if self.db is None:
+            return
+        self.db.execute("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, vec.tobytes()))
+        self.db.commit()
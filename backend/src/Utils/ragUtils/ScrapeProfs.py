@@ -1,13 +1,18 @@
 
 import argparse
+import asyncio
 import csv
 import json
+import os
 import re
 import sys
+import time
 from dataclasses import dataclass, asdict
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
 
+import httpx
 import requests
 from bs4 import BeautifulSoup, NavigableString, Tag
 
@@ -19,18 +24,163 @@ def norm_ws(text: str) -> str:
     return WS_RE.sub(" ", text or "").strip()
 
 
-def fetch_html(url: str, timeout: int = 20) -> Tuple[str, str]:
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; FacultyProfileScraper/1.0; +https://example.org/bot)"
+}
+
+
+def fetch_html(url: str, timeout: int = 20, session: Optional[requests.Session] = None) -> Tuple[str, str]:
     """
     Fetch HTML from URL. Returns (final_url, text).
+    Pass a session to reuse pooled connections across many fetches.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; FacultyProfileScraper/1.0; +https://example.org/bot)"
-    }
-    resp = requests.get(url, headers=headers, timeout=timeout)
+    resp = (session or requests).get(url, headers=HEADERS, timeout=timeout)
     resp.raise_for_status()
     return (str(resp.url), resp.text)
 
 
+# === Async crawling ===
+@dataclass
+class FetchResult:
+    url: str
+    final_url: str
+    html: Optional[str]
+    status: int
+    not_modified: bool = False
+    error: Optional[str] = None
+
+
+class ValidatorCache:
+    """
+    ETag / Last-Modified per URL, persisted as JSON so re-crawls can send conditional GETs.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, headers) -> None:
+        entry = {}
+        if headers.get("etag"):
+            entry["etag"] = headers["etag"]
+        if headers.get("last-modified"):
+            entry["last_modified"] = headers["last-modified"]
+        if entry:
+            self.entries[url] = entry
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+
+class AsyncCrawler:
+    """
+    Fetch many URLs on one pooled httpx client with a global concurrency bound, a
+    per-host bound and spacing (raised to the site's robots.txt Crawl-delay), and
+    conditional GETs. Pages that answer 304 come back with not_modified=True and no html.
+    New ETag/Last-Modified values stay pending until save_Validators() is called for the
+    pages whose records were written, so a run that fails later re-fetches them in full.
+    """
+
+    def __init__(self, concurrency: int = 16, per_host: int = 2, min_interval: float = 0.5,
+                 cache_path: Optional[str] = None, respect_robots: bool = True, timeout: int = 20):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.respect_robots = respect_robots
+        self.timeout = timeout
+        self.validators = ValidatorCache(cache_path)
+        self.pending_validators: Dict[str, Dict[str, str]] = {}
+        self.host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.host_next: Dict[str, float] = {}
+        self.robots: Dict[str, Optional[RobotFileParser]] = {}
+        self.robots_locks: Dict[str, asyncio.Lock] = {}
+
+    async def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        gate = asyncio.Semaphore(self.concurrency)
+        async with httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=self.timeout, follow_redirects=True) as client:
+            async def bounded(url: str) -> FetchResult:
+                async with gate:
+                    return await self.__fetch_one(client, url)
+            results = await asyncio.gather(*(bounded(u) for u in urls))
+        return list(results)
+
+    def save_Validators(self, urls: List[str]) -> None:
+        for url in urls:
+            headers = self.pending_validators.pop(url, None)
+            if headers is not None:
+                self.validators.update(url, headers)
+        self.validators.save()
+
+    async def __fetch_one(self, client: httpx.AsyncClient, url: str) -> FetchResult:
+        host = urlparse(url).netloc
+        try:
+            robots = await self.__get_robots(client, url)
+            if robots is not None and not robots.can_fetch(HEADERS["User-Agent"], url):
+                return FetchResult(url=url, final_url=url, html=None, status=0, error="disallowed by robots.txt")
+
+            slot = self.host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+            async with slot:
+                await self.__wait_for_host(host, robots)
+                resp = await client.get(url, headers=self.validators.request_headers(url))
+
+            if resp.status_code == 304:
+                return FetchResult(url=url, final_url=url, html=None, status=304, not_modified=True)
+            resp.raise_for_status()
+            self.pending_validators[url] = {k: resp.headers[k] for k in ("etag", "last-modified") if k in resp.headers}
+            return FetchResult(url=url, final_url=str(resp.url), html=resp.text, status=resp.status_code)
+        except Exception as e:
+            return FetchResult(url=url, final_url=url, html=None, status=0, error=str(e))
+
+    async def __wait_for_host(self, host: str, robots: Optional[RobotFileParser]) -> None:
+        interval = self.min_interval
+        if robots is not None:
+            delay = robots.crawl_delay(HEADERS["User-Agent"])
+            if delay:
+                interval = max(interval, float(delay))
+        now = time.monotonic()
+        start = max(now, self.host_next.get(host, now))
+        self.host_next[host] = start + interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __get_robots(self, client: httpx.AsyncClient, url: str) -> Optional[RobotFileParser]:
+        if not self.respect_robots:
+            return None
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        lock = self.robots_locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            if origin not in self.robots:
+                parser: Optional[RobotFileParser] = None
+                try:
+                    resp = await client.get(origin + "/robots.txt")
+                    if resp.status_code == 200:
+                        parser = RobotFileParser()
+                        parser.parse(resp.text.splitlines())
+                except httpx.HTTPError:
+                    pass
+                self.robots[origin] = parser
+        return self.robots[origin]
+
+
 def best_text(nodes: List[Tag], max_chars: int = 2000) -> str:
     chunks: List[str] = []
     for n in nodes:
@@ -46,6 +196,39 @@ def best_text(nodes: List[Tag], max_chars: int = 2000) -> str:
     return text
 
 
+# === Single-pass page index ===
+# lxml builds the tree several times faster than html.parser. Pinned rather than probed: the two
+# parsers repair broken markup differently, and a silent switch changes the extracted details
+# (and so every content_hash)
+DEFAULT_PARSER = "lxml"
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+HEADING_CLASSES = {"section-title", "subhead", "heading"}
+
+
+class PageIndex:
+    """
+    Text views every extractor needs, computed in one walk over the tree:
+    whole-page text, <p> and <li> elements with their normalized text, and headings.
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+        self.text = soup.get_text(" ", strip=True)
+        self.paragraphs: List[Tuple[Tag, str]] = []
+        self.list_items: List[Tuple[Tag, str]] = []
+        self.headings: List[Tuple[Tag, str]] = []
+
+        for tag in soup.find_all(True):
+            name = tag.name
+            if name == "p":
+                self.paragraphs.append((tag, norm_ws(tag.get_text())))
+            elif name == "li":
+                self.list_items.append((tag, norm_ws(tag.get_text(" ", strip=True))))
+            if name in HEADING_TAGS or HEADING_CLASSES.intersection(tag.get("class") or ()):
+                self.headings.append((tag, norm_ws(tag.get_text()).lower()))
+
+
 def extract_name(soup: BeautifulSoup) -> Optional[str]:
     schema_person = soup.select('[itemtype*="schema.org/Person"] [itemprop="name"]')
     if schema_person:
@@ -79,7 +262,7 @@ def extract_name(soup: BeautifulSoup) -> Optional[str]:
     return None
 
 
-def extract_emails(soup: BeautifulSoup) -> List[str]:
+def extract_emails(soup: BeautifulSoup, page: Optional[PageIndex] = None) -> List[str]:
     emails = set()
     for a in soup.select('a[href^="mailto:"]'):
         href = a.get("href", "")
@@ -87,7 +270,7 @@ def extract_emails(soup: BeautifulSoup) -> List[str]:
         if EMAIL_REGEX.fullmatch(email):
             emails.add(email)
 
-    text = soup.get_text(" ", strip=True)
+    text = page.text if page else soup.get_text(" ", strip=True)
     for m in EMAIL_REGEX.finditer(text):
         emails.add(m.group(1))
 
@@ -113,10 +296,13 @@ PUB_HEADINGS = (
 )
 
 
-def find_section_by_heading(soup: BeautifulSoup, keywords: Tuple[str, ...]) -> Optional[Tag]:
-    headings = soup.select("h1, h2, h3, h4, h5, h6, .section-title, .subhead, .heading")
-    for h in headings:
-        text = norm_ws(h.get_text()).lower()
+def find_section_by_heading(soup: BeautifulSoup, keywords: Tuple[str, ...], page: Optional[PageIndex] = None) -> Optional[Tag]:
+    if page:
+        headings = page.headings
+    else:
+        headings = [(h, norm_ws(h.get_text()).lower())
+                    for h in soup.select("h1, h2, h3, h4, h5, h6, .section-title, .subhead, .heading")]
+    for h, text in headings:
         if any(k in text for k in keywords):
             container = h.parent if h.parent else h
             sib = h.find_next_sibling()
@@ -126,8 +312,8 @@ def find_section_by_heading(soup: BeautifulSoup, keywords: Tuple[str, ...]) -> O
     return None
 
 
-def extract_biography(soup: BeautifulSoup) -> Optional[str]:
-    sec = find_section_by_heading(soup, BIO_HEADINGS)
+def extract_biography(soup: BeautifulSoup, page: Optional[PageIndex] = None) -> Optional[str]:
+    sec = find_section_by_heading(soup, BIO_HEADINGS, page)
     if sec:
         paras = sec.find_all(["p"], recursive=True)
         if paras:
@@ -144,23 +330,22 @@ def extract_biography(soup: BeautifulSoup) -> Optional[str]:
         if len(cand) >= 60:
             return cand
 
-    all_paras = soup.find_all("p")
-    blocks: List[List[Tag]] = []
-    current: List[Tag] = []
-    for p in all_paras:
-        txt = norm_ws(p.get_text())
+    all_paras = page.paragraphs if page else [(p, norm_ws(p.get_text())) for p in soup.find_all("p")]
+    blocks: List[List[Tuple[Tag, str]]] = []
+    current: List[Tuple[Tag, str]] = []
+    for p, txt in all_paras:
         if len(txt) < 30:
             if current:
                 blocks.append(current)
                 current = []
             continue
-        current.append(p)
+        current.append((p, txt))
     if current:
         blocks.append(current)
 
     if blocks:
-        best = max(blocks, key=lambda b: sum(len(norm_ws(p.get_text())) for p in b))
-        text = best_text(best[:8], max_chars=1500)
+        best = max(blocks, key=lambda b: sum(len(txt) for _, txt in b))
+        text = best_text([p for p, _ in best[:8]], max_chars=1500)
         if len(text) >= 80:
             return text
     return None
@@ -201,8 +386,8 @@ def _split_list_items(container: Tag) -> List[str]:
     return out
 
 
-def extract_publications(soup: BeautifulSoup, limit: int = 50) -> List[str]:
-    sec = find_section_by_heading(soup, PUB_HEADINGS)
+def extract_publications(soup: BeautifulSoup, limit: int = 50, page: Optional[PageIndex] = None) -> List[str]:
+    sec = find_section_by_heading(soup, PUB_HEADINGS, page)
     if sec:
         items = _split_list_items(sec)
         if items:
@@ -214,7 +399,10 @@ def extract_publications(soup: BeautifulSoup, limit: int = 50) -> List[str]:
         if items:
             return items[:limit]
 
-    all_li = [norm_ws(li.get_text(" ", strip=True)) for li in soup.find_all("li")]
+    if page:
+        all_li = [txt for _, txt in page.list_items]
+    else:
+        all_li = [norm_ws(li.get_text(" ", strip=True)) for li in soup.find_all("li")]
     pubs = [t for t in all_li if len(t) > 30 and any(ch in t for ch in (".", "—", "-"))]
     pubs = sorted(pubs, key=len, reverse=True)[:limit]
     return pubs
@@ -231,12 +419,22 @@ class ProfessorRecord:
 
 def scrape_professor_page(url: str) -> ProfessorRecord:
     final_url, html = fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+    return parse_professor_page(final_url, html)
+
+
+def parse_professor_page(final_url: str, html: str, parser: str = DEFAULT_PARSER) -> ProfessorRecord:
+    """
+    Parse already-fetched HTML. Split from scrape_professor_page so fetching and
+    parsing can run as separate stages. The tree is walked once into a PageIndex
+    that all extractors share.
+    """
+    soup = BeautifulSoup(html, parser)
+    page = PageIndex(soup)
 
     name = extract_name(soup)
-    emails = extract_emails(soup)
-    information = extract_biography(soup)
-    publications = extract_publications(soup)
+    emails = extract_emails(soup, page)
+    information = extract_biography(soup, page)
+    publications = extract_publications(soup, page=page)
 
     return ProfessorRecord(
         source_url=final_url,
@@ -247,6 +445,27 @@ def scrape_professor_page(url: str) -> ProfessorRecord:
     )
 
 
+async def scrape_professor_pages_async(urls: List[str], crawler: Optional[AsyncCrawler] = None,
+                                       **crawler_kwargs) -> Tuple[List[ProfessorRecord], List[FetchResult]]:
+    """
+    Crawl urls concurrently and parse every page that changed.
+    Returns (records, fetch_results); unchanged (304) and failed pages have no record, and a
+    page that fails to parse gets its error set. Call crawler.save_Validators() once the
+    records are stored.
+    """
+    crawler = crawler or AsyncCrawler(**crawler_kwargs)
+    results = await crawler.fetch_all(urls)
+    records = []
+    for r in results:
+        if r.html is None:
+            continue
+        try:
+            records.append(parse_professor_page(r.final_url, r.html))
+        except Exception as e:
+            r.error = f"parse failed: {e}"
+    return records, results
+
+
 # === New Function ===
 def get_professor_info(url: str) -> Tuple[str, str, str]:
     """
@@ -254,7 +473,13 @@ def get_professor_info(url: str) -> Tuple[str, str, str]:
     Returns:
         (name, emails_str, bio_and_pubs_markdown)
     """
-    record = scrape_professor_page(url)
+    return format_professor_info(scrape_professor_page(url))
+
+
+def format_professor_info(record: ProfessorRecord) -> Tuple[str, str, str]:
+    """
+    Format a parsed record the same way get_professor_info does.
+    """
     name = record.name or "N/A"
     emails_str = "; ".join(record.emails) if record.emails else "N/A"
 
@@ -270,6 +495,23 @@ def write_jsonl(records: List[ProfessorRecord], path: str) -> None:
             f.write(json.dumps(asdict(r), ensure_ascii=False) + "\n")
 
 
+def read_jsonl(path: str) -> List[ProfessorRecord]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [ProfessorRecord(**json.loads(line)) for line in f if line.strip()]
+
+
+def merge_records(previous: List[ProfessorRecord], fresh: List[ProfessorRecord]) -> List[ProfessorRecord]:
+    """
+    previous with fresh records replacing the ones for the same source_url (new pages appended),
+    so pages skipped as unchanged (304) or failed this run keep their last parsed record.
+    """
+    merged = {r.source_url: r for r in previous}
+    merged.update((r.source_url, r) for r in fresh)
+    return list(merged.values())
+
+
 def write_csv(records: List[ProfessorRecord], path: str) -> None:
     fieldnames = ["source_url", "name", "emails", "information", "publications"]
     with open(path, "w", encoding="utf-8", newline="") as f:
@@ -304,6 +546,12 @@ def main():
     ap.add_argument("--url-file", help="Path to a text file with one URL per line.")
     ap.add_argument("--jsonl", default="professors.jsonl", help="Output JSONL path.")
     ap.add_argument("--csv", default="professors.csv", help="Output CSV path.")
+    ap.add_argument("--async", dest="use_async", action="store_true", help="Crawl concurrently on a pooled async client.")
+    ap.add_argument("--concurrency", type=int, default=16, help="Max requests in flight (async mode).")
+    ap.add_argument("--per-host", type=int, default=2, help="Max requests in flight per host (async mode).")
+    ap.add_argument("--min-interval", type=float, default=0.5, help="Seconds between requests to one host (async mode).")
+    ap.add_argument("--validator-cache", help="JSON file of ETag/Last-Modified values; unchanged pages are skipped (async mode).")
+    ap.add_argument("--ignore-robots", action="store_true", help="Don't consult robots.txt (async mode).")
     args = ap.parse_args()
 
     urls = read_urls(args)
@@ -312,16 +560,39 @@ def main():
         sys.exit(2)
 
     records: List[ProfessorRecord] = []
-    for u in urls:
-        try:
-            rec = scrape_professor_page(u)
-            records.append(rec)
-            print(f"[ok] {u}")
-        except Exception as e:
-            print(f"[error] {u} -> {e}", file=sys.stderr)
+    if args.use_async:
+        crawler = AsyncCrawler(
+            concurrency=args.concurrency,
+            per_host=args.per_host,
+            min_interval=args.min_interval,
+            cache_path=args.validator_cache,
+            respect_robots=not args.ignore_robots,
+        )
+        records, results = asyncio.run(scrape_professor_pages_async(urls, crawler=crawler))
+        for r in results:
+            if r.error:
+                print(f"[error] {r.url} -> {r.error}", file=sys.stderr)
+            elif r.not_modified:
+                print(f"[unchanged] {r.url}")
+            else:
+                print(f"[ok] {r.url}")
+        if args.validator_cache:
+            # Only changed pages were parsed; carry the rest over from the previous output
+            records = merge_records(read_jsonl(args.jsonl), records)
+    else:
+        for u in urls:
+            try:
+                rec = scrape_professor_page(u)
+                records.append(rec)
+                print(f"[ok] {u}")
+            except Exception as e:
+                print(f"[error] {u} -> {e}", file=sys.stderr)
 
     write_jsonl(records, args.jsonl)
     write_csv(records, args.csv)
+    if args.use_async:
+        # Only now is it safe to answer 304 for these pages next time
+        crawler.save_Validators([r.url for r in results if r.html is not None and not r.error])
     print(f"Wrote {len(records)} records to: {args.jsonl} and {args.csv}")
 
 
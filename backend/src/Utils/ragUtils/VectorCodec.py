@@ -0,0 +1,57 @@
+import hashlib
+import json
+
+import numpy as np
+
+# Wire formats for embeddings. Vectors stay float32 ndarrays inside the Python layer and are
+# only turned into text at the HTTP boundary:
+#   to_Pgvector(vec)  pgvector text literal "[0.0123,-0.04,...]" with the shortest digits that
+#                     round-trip a float32 (~10 chars/value instead of ~19 for float64 repr)
+#   dumps(obj)        JSON bytes for RPC payloads / API responses; ndarrays serialize natively
+#   parse(value)      pgvector text / JSON list / ndarray -> float32 ndarray
+#   digest(value)     cache key for a vector
+# orjson does all three in C when installed; the json fallback produces the same output, slower.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DTYPE = np.float32
+
+
+def to_Array(value) -> np.ndarray:
+    return np.asarray(value, dtype=DTYPE)
+
+
+def parse(value) -> np.ndarray:
+    if isinstance(value, (str, bytes)):
+        value = orjson.loads(value) if orjson is not None else json.loads(value)
+    return to_Array(value)
+
+
+def digest(value) -> str:
+    """Stable hex key for a vector: sha1 of its float32 bytes."""
+    return hashlib.sha1(to_Array(value).tobytes()).hexdigest()
+
+
+def to_Pgvector(value) -> str:
+    vec = to_Array(value)
+    if orjson is not None:
+        return orjson.dumps(vec, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    # str of a numpy float32 scalar is its shortest round-trip form
+    return "[" + ",".join(str(x) for x in vec) + "]"
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return [float(str(x)) for x in obj] if obj.dtype == DTYPE else obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,244 @@
+import threading
+from typing import Optional
+
+import numpy as np
+
+from Utils.ragUtils import VectorCodec
+
+# In-process copy of professor_embeddings. Rows are L2-normalized float32 so a
+# single matrix-vector product gives the cosine similarity for every chunk; chunk
+# scores are then folded into one score per professor.
+
+PAGE_SIZE = 1000
+
+
+def to_Vector(value) -> np.ndarray:
+    """
+    Convert an embedding coming from the DB (pgvector string "[..]" or a JSON list)
+    or from the model (list / ndarray) into a float32 ndarray.
+    """
+    return VectorCodec.parse(value)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    dim: int
+    vectors: np.ndarray   # (chunks, dim)
+    owners: np.ndarray    # (chunks,) index into profs for each chunk row
+    chunks: list[str]
+    profs: list[dict]
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.owners = np.empty(0, dtype=np.int64)
+        self.chunks = []
+        self.profs = []
+        self.ready = False
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.profs)
+
+# ============ BUILD INDEX ============= #
+    def load_From_DB(self, supabase) -> int:
+        """
+        Page through professor_embeddings (joined with professors) and swap in a fresh matrix.
+        Returns the number of professors loaded.
+        """
+        vectors: list[np.ndarray] = []
+        owners: list[int] = []
+        chunks: list[str] = []
+        profs: list[dict] = []
+        positions: dict[int, int] = {}
+        last_id = None
+        while True:
+            # Keyset pages in id order: rows inserted or deleted by a concurrent ingest can't shift
+            # later pages, and a PostgREST max-rows cap below PAGE_SIZE can't end the load early
+            query = (
+                supabase.table("professor_embeddings")
+                .select("id, professor_id, embedding, chunk, professors(name, email, department, research_areas)")
+                .order("id")
+                .limit(PAGE_SIZE)
+            )
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = query.execute().data or []
+            if not page:
+                break
+            for record in page:
+                prof_id = record["professor_id"]
+                if prof_id not in positions:
+                    prof = record.get("professors") or {}
+                    positions[prof_id] = len(profs)
+                    profs.append(self.__make_Prof(prof_id, prof.get("name"), prof.get("email"),
+                                                  prof.get("department"), prof.get("research_areas")))
+                vectors.append(to_Vector(record["embedding"]))
+                owners.append(positions[prof_id])
+                chunks.append(record.get("chunk") or "")
+            last_id = page[-1]["id"]
+
+        matrix = normalize(np.vstack(vectors)) if vectors else np.empty((0, self.dim), dtype=np.float32)
+        with self.lock:
+            self.vectors = np.ascontiguousarray(matrix, dtype=np.float32)
+            self.owners = np.asarray(owners, dtype=np.int64)
+            self.chunks = chunks
+            self.profs = profs
+            self.ready = True
+        return len(profs)
+
+    def add(self, professor_id: int, name: str, email: str, details: str, embeddings, chunks: Optional[list[str]] = None,
+            department: Optional[str] = None) -> None:
+        """
+        Append one professor (one or more chunk vectors) without reloading. Copy-on-write
+        so that searches running concurrently keep a consistent view.
+        """
+        vecs = normalize(to_Vector(embeddings).reshape(-1, self.dim))
+        chunks = chunks if chunks is not None else [details] * len(vecs)
+        prof = self.__make_Prof(professor_id, name, email, department, details)
+        with self.lock:
+            owner = len(self.profs)
+            self.vectors = np.ascontiguousarray(np.vstack([self.vectors, vecs]), dtype=np.float32)
+            self.owners = np.concatenate([self.owners, np.full(len(vecs), owner, dtype=np.int64)])
+            self.chunks = self.chunks + list(chunks)
+            self.profs = self.profs + [prof]
+
+    def remove_Professor(self, professor_id: int) -> None:
+        with self.lock:
+            drop = [i for i, prof in enumerate(self.profs) if prof["professor_id"] == professor_id]
+            if not drop:
+                return
+            keep_rows = ~np.isin(self.owners, drop)
+            # Shift owner indices down past the removed professors
+            remap = np.cumsum([0 if i in drop else 1 for i in range(len(self.profs))]) - 1
+            self.vectors = np.ascontiguousarray(self.vectors[keep_rows], dtype=np.float32)
+            self.owners = remap[self.owners[keep_rows]]
+            self.chunks = [c for c, keep in zip(self.chunks, keep_rows) if keep]
+            self.profs = [p for i, p in enumerate(self.profs) if i not in drop]
+
+# ============ SEARCH ============= #
+    def search(self, embedding, match_count: int = 5, match_threshold: Optional[float] = None,
+               department: Optional[str] = None, require_email: bool = False,
+               aggregate: str = "max", top_m: int = 3) -> list[dict]:
+        """
+        Same contract as the top_professor_matches RPC: top match_count professors by cosine
+        similarity, optionally limited to a department / professors with an email.
+        A professor's score is its best chunk ("max") or the mean of its top_m chunks ("mean").
+        """
+        with self.lock:
+            vectors, owners, chunks, profs = self.vectors, self.owners, self.chunks, self.profs
+        if not profs or not len(owners) or match_count <= 0:
+            return []
+
+        query = normalize(to_Vector(embedding))
+        chunk_scores = vectors @ query
+        scores, best_rows = self.__aggregate(chunk_scores, owners, len(profs), aggregate, top_m)
+
+        if department is not None or require_email:
+            mask = np.array([self.__matches_Filters(p, department, require_email) for p in profs], dtype=bool)
+            scores = np.where(mask, scores, -np.inf)
+        if match_threshold is not None:
+            scores = np.where(scores >= match_threshold, scores, -np.inf)
+
+        k = min(match_count, len(profs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [{**profs[i], "best_chunk": chunks[best_rows[i]], "similarity": float(scores[i])}
+                for i in top if np.isfinite(scores[i])]
+
+    def search_Batch(self, embeddings, match_count: int = 5, match_threshold: Optional[float] = None,
+                     department: Optional[str] = None, require_email: bool = False,
+                     aggregate: str = "max", top_m: int = 3) -> list[list[dict]]:
+        """
+        search() for many queries at once: one (queries x chunks) matrix product, then per-professor
+        folding and top-k selection over whole rows. Returns one result list per query, in order.
+        """
+        queries = to_Vector(embeddings).reshape(-1, self.dim)
+        with self.lock:
+            vectors, owners, chunks, profs = self.vectors, self.owners, self.chunks, self.profs
+        if not profs or not len(owners) or match_count <= 0 or not len(queries):
+            return [[] for _ in range(len(queries))]
+
+        chunk_scores = normalize(queries) @ vectors.T
+        # Group chunk rows by professor once for the whole batch
+        order = np.argsort(owners, kind="stable")
+        sorted_owners = owners[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(sorted_owners)) + 1]
+        group_end = np.r_[group_start[1:], len(order)]
+        rows_of = {int(sorted_owners[s]): order[s:e] for s, e in zip(group_start, group_end)}
+
+        if aggregate == "max":
+            scores = np.full((len(queries), len(profs)), -np.inf, dtype=np.float32)
+            scores[:, sorted_owners[group_start]] = np.maximum.reduceat(chunk_scores[:, order], group_start, axis=1)
+        else:
+            scores = np.vstack([self.__aggregate(row, owners, len(profs), aggregate, top_m)[0] for row in chunk_scores])
+
+        if department is not None or require_email:
+            mask = np.array([self.__matches_Filters(p, department, require_email) for p in profs], dtype=bool)
+            scores = np.where(mask, scores, -np.inf)
+        if match_threshold is not None:
+            scores = np.where(scores >= match_threshold, scores, -np.inf)
+
+        k = min(match_count, len(profs))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+        results = []
+        for q, row in enumerate(top):
+            matches = []
+            for i in row:
+                if not np.isfinite(scores[q, i]):
+                    continue
+                rows = rows_of[int(i)]
+                best = rows[np.argmax(chunk_scores[q, rows])]
+                matches.append({**profs[i], "best_chunk": chunks[best], "similarity": float(scores[q, i])})
+            results.append(matches)
+        return results
+
+    def is_Ready(self) -> bool:
+        return self.ready
+
+# ============ Helper METHODS ============= #
+    def __aggregate(self, chunk_scores: np.ndarray, owners: np.ndarray, n_profs: int,
+                    aggregate: str, top_m: int) -> tuple[np.ndarray, np.ndarray]:
+        """Fold chunk scores into per-professor scores; also returns each professor's best chunk row."""
+        # Sort rows by (professor, score desc) so each professor's chunks are contiguous and ranked
+        order = np.lexsort((-chunk_scores, owners))
+        sorted_owners = owners[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(sorted_owners)) + 1]
+
+        best_rows = np.zeros(n_profs, dtype=np.int64)
+        best_rows[sorted_owners[group_start]] = order[group_start]
+
+        scores = np.full(n_profs, -np.inf, dtype=np.float32)
+        if aggregate == "max":
+            scores[sorted_owners[group_start]] = chunk_scores[order[group_start]]
+        elif aggregate == "mean":
+            rank = np.arange(len(order)) - np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))
+            top = rank < top_m
+            sums = np.zeros(n_profs, dtype=np.float32)
+            counts = np.zeros(n_profs, dtype=np.float32)
+            np.add.at(sums, sorted_owners[top], chunk_scores[order[top]])
+            np.add.at(counts, sorted_owners[top], 1)
+            has = counts > 0
+            scores[has] = sums[has] / counts[has]
+        else:
+            raise ValueError(f"Unknown aggregate: {aggregate}")
+        return scores, best_rows
+
+    def __make_Prof(self, professor_id: int, name: Optional[str], email: Optional[str],
+                    department: Optional[str], details: Optional[str]) -> dict:
+        return {"professor_id": professor_id, "name": name, "email": email, "department": department, "details": details}
+
+    def __matches_Filters(self, prof: dict, department: Optional[str], require_email: bool) -> bool:
+        if department is not None and prof["department"] != department:
+            return False
+        if require_email and (not prof["email"] or prof["email"] == "N/A"):
+            return False
+        return True
@@ -0,0 +1,60 @@
+-- Server-side ranking used by SupabaseAPI.rag_Search.
+-- match_count, match_threshold and the filters are applied in SQL so the
+-- response size depends on k, not on the size of professor_embeddings.
+-- Each professor has several chunk rows; their similarities are folded into one
+-- score per professor: the best chunk ('max') or the mean of the top_m chunks ('mean').
+create or replace function public.top_professor_matches(
+  user_embedding vector(384),
+  match_count int default 5,
+  match_threshold float default null,
+  filter_department text default null,
+  require_email boolean default false,
+  aggregate text default 'max',
+  top_m int default 3
+)
+returns table (
+  professor_id int,
+  name text,
+  email text,
+  department text,
+  details text,
+  best_chunk text,
+  similarity float
+)
+language sql stable
+as $$
+  with scored as (
+    select
+      pe.professor_id,
+      pe.chunk,
+      1 - (pe.embedding <=> user_embedding) as sim,
+      row_number() over (partition by pe.professor_id order by pe.embedding <=> user_embedding) as chunk_rank
+    from public.professor_embeddings pe
+  ),
+  per_professor as (
+    select
+      scored.professor_id,
+      case when aggregate = 'mean'
+        then avg(sim) filter (where chunk_rank <= top_m)
+        else max(sim)
+      end as similarity,
+      max(chunk) filter (where chunk_rank = 1) as best_chunk
+    from scored
+    group by scored.professor_id
+  )
+  select
+    p.id as professor_id,
+    p.name,
+    p.email,
+    p.department,
+    p.research_areas as details,
+    pp.best_chunk,
+    pp.similarity
+  from per_professor pp
+  join public.professors p on p.id = pp.professor_id
+  where (filter_department is null or p.department = filter_department)
+    and (not require_email or (p.email is not null and p.email <> 'N/A'))
+    and (match_threshold is null or pp.similarity >= match_threshold)
+  order by pp.similarity desc
+  limit match_count;
+$$;
@@ -0,0 +1,282 @@
+"""
+Latency / throughput of the matching path, reported as JSON so runs can be diffed between versions.
+
+    python -m bench.benchMatching --profs 2000 --out bench_matching.json
+    python -m bench.benchMatching --skip embedding,api --profs 20000
+
+Sections:
+  embedding   EmbGenerator.generate_Embedding one text at a time vs generate_Embeddings in batches
+  rag_search  SupabaseAPI.rag_Search (sync and async) against a local stand-in for the Supabase
+              RPC, serving a synthetic professor_embeddings table, plus the in-process VectorIndex
+  api         POST /api/matches under concurrent load through the FastAPI TestClient
+
+No real Supabase is needed: DATABASE_URL is pointed at the stand-in server for the whole run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from Utils.ragUtils.VectorIndex import VectorIndex
+
+DIM = 384
+WORDS = ("machine learning vision robotics graph theory quantum chemistry biology networks security "
+         "compilers databases optimization control signal processing language models materials energy").split()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies_ms: list[float], wall_s: float, items: int | None = None) -> dict:
+    items = len(latencies_ms) if items is None else items
+    return {
+        "count": items,
+        "mean_ms": statistics.mean(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": max(latencies_ms),
+        "throughput_per_s": items / wall_s if wall_s > 0 else 0.0,
+    }
+
+
+def synthetic_texts(n: int, words: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) for _ in range(n)]
+
+
+def synthetic_index(profs: int, chunks_per_prof: int, seed: int) -> VectorIndex:
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(dim=DIM)
+    departments = ["CS", "ECE", "ME", "CHEM", "BIO"]
+    vectors = rng.standard_normal((profs, chunks_per_prof, DIM), dtype=np.float32)
+    for i in range(profs):
+        index.add(professor_id=i + 1, name=f"Professor {i + 1}", email=f"prof{i + 1}@example.edu",
+                  details=f"Synthetic research profile {i + 1}", embeddings=vectors[i],
+                  chunks=[f"chunk {j} of professor {i + 1}" for j in range(chunks_per_prof)],
+                  department=departments[i % len(departments)])
+    index.ready = True
+    return index
+
+
+# ============ STAND-IN SUPABASE ============= #
+class StandInServer:
+    """
+    Just enough of PostgREST for SupabaseAPI: the top_professor_matches RPC is answered from a
+    VectorIndex (same contract as the SQL function); table reads return [] and writes succeed.
+    """
+
+    def __init__(self, index: VectorIndex):
+        index_ref = index
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def __reply(self, status: int, body) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def __body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_POST(self):
+                payload = self.__body()
+                if self.path.startswith("/rest/v1/rpc/top_professor_matches"):
+                    matches = index_ref.search(
+                        payload["user_embedding"], payload.get("match_count", 5),
+                        match_threshold=payload.get("match_threshold"),
+                        department=payload.get("filter_department"),
+                        require_email=payload.get("require_email", False),
+                        aggregate=payload.get("aggregate", "max"), top_m=payload.get("top_m", 3),
+                    )
+                    self.__reply(200, matches)
+                else:
+                    self.__reply(201, [])
+
+            def do_GET(self):
+                self.__reply(200, [])
+
+            def do_DELETE(self):
+                self.__reply(200, [])
+
+            def do_PATCH(self):
+                self.__reply(200, [])
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ============ SECTIONS ============= #
+def bench_embedding(n: int, batch_size: int, seed: int) -> dict:
+    from Utils.ragUtils import EmbGenerator
+
+    texts = synthetic_texts(n, 40, seed)
+    EmbGenerator.warm_Up()
+
+    single = []
+    start = time.perf_counter()
+    for text in texts:
+        t = time.perf_counter()
+        EmbGenerator.generate_Embedding(text, use_cache=False)
+        single.append((time.perf_counter() - t) * 1000)
+    single_wall = time.perf_counter() - start
+
+    batches = []
+    start = time.perf_counter()
+    for i in range(0, n, batch_size):
+        t = time.perf_counter()
+        EmbGenerator.generate_Embeddings(texts[i:i + batch_size], batch_size=batch_size)
+        batches.append((time.perf_counter() - t) * 1000)
+    batch_wall = time.perf_counter() - start
+
+    return {
+        "texts": n,
+        "single": summarize(single, single_wall),
+        # Latencies are per batch; count/throughput are per text
+        "batch": {**summarize(batches, batch_wall, items=n), "batch_size": batch_size},
+        "speedup": single_wall / batch_wall if batch_wall > 0 else 0.0,
+    }
+
+
+def bench_rag_search(db, index: VectorIndex, queries: np.ndarray, k: int, concurrency: int) -> dict:
+    report = {}
+
+    latencies = []
+    start = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        db.rag_Search(q.tolist(), match_count=k)
+        latencies.append((time.perf_counter() - t) * 1000)
+    report["rpc"] = summarize(latencies, time.perf_counter() - start)
+
+    async def run_async() -> tuple[list[float], float]:
+        sem = asyncio.Semaphore(concurrency)
+        out = []
+
+        async def one(q):
+            async with sem:
+                t = time.perf_counter()
+                await db.rag_Search_Async(q.tolist(), match_count=k)
+                out.append((time.perf_counter() - t) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        wall = time.perf_counter() - start
+        await db.aclose()
+        return out, wall
+
+    latencies, wall = asyncio.run(run_async())
+    report["rpc_async"] = {**summarize(latencies, wall), "concurrency": concurrency}
+
+    latencies = []
+    start = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        index.search(q, match_count=k)
+        latencies.append((time.perf_counter() - t) * 1000)
+    report["local_index"] = summarize(latencies, time.perf_counter() - start)
+    return report
+
+
+def bench_api(requests_total: int, concurrency: int, distinct: int, k: int, seed: int) -> dict:
+    from fastapi.testclient import TestClient
+    import main
+
+    rng = random.Random(seed)
+    texts = synthetic_texts(distinct, 25, seed + 1)
+    bodies = [{"interests": rng.choice(texts), "user_id": rng.randint(1, distinct), "num_matches": k}
+              for _ in range(requests_total)]
+
+    with TestClient(main.app) as client:
+        client.post("/api/matches", json=bodies[0])
+
+        def one(body):
+            t = time.perf_counter()
+            r = client.post("/api/matches", json=body)
+            r.raise_for_status()
+            return (time.perf_counter() - t) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, bodies))
+        wall = time.perf_counter() - start
+
+    return {**summarize(latencies, wall), "concurrency": concurrency, "distinct_interests": distinct}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark embedding, vector search and /api/matches.")
+    ap.add_argument("--profs", type=int, default=2000, help="Professors in the synthetic table.")
+    ap.add_argument("--chunks", type=int, default=3, help="Chunk embeddings per professor.")
+    ap.add_argument("--queries", type=int, default=200, help="Searches per rag_search mode.")
+    ap.add_argument("--k", type=int, default=10, help="match_count for every search.")
+    ap.add_argument("--texts", type=int, default=256, help="Texts for the embedding section.")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--requests", type=int, default=200, help="Requests for the api section.")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--distinct", type=int, default=50, help="Distinct interests texts in the api section.")
+    ap.add_argument("--skip", default="", help="Comma-separated sections to skip: embedding,rag_search,api.")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="Write the JSON report here as well as to stdout.")
+    args = ap.parse_args()
+    skip = {s.strip() for s in args.skip.split(",") if s.strip()}
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "out"}}
+    index = synthetic_index(args.profs, args.chunks, args.seed)
+
+    with StandInServer(index) as server:
+        # Every SupabaseAPI built from here on (including the one in main) talks to the stand-in
+        os.environ["DATABASE_URL"] = server.url
+        os.environ["SUPABASE_PUBLIC"] = "bench.bench.bench"
+        os.environ["USE_LOCAL_INDEX"] = "0"
+
+        if "embedding" not in skip:
+            report["embedding"] = bench_embedding(args.texts, args.batch_size, args.seed)
+        if "rag_search" not in skip:
+            from Utils.SupabaseAPI import SupabaseAPI
+            queries = np.random.default_rng(args.seed + 1).standard_normal((args.queries, DIM), dtype=np.float32)
+            report["rag_search"] = bench_rag_search(SupabaseAPI(), index, queries, args.k, args.concurrency)
+        if "api" not in skip:
+            report["api"] = bench_api(args.requests, args.concurrency, args.distinct, args.k, args.seed)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Per-page parse time for ScrapeProfs over a saved corpus of faculty pages.
+
+    python -m bench.benchScrape --save-from Utils/data/profLinks.txt --corpus bench/corpus --limit 50
+    python -m bench.benchScrape --corpus bench/corpus --repeat 5 --out bench_scrape.json
+
+"legacy" is the old path (html.parser, every extractor walks the tree itself);
+"fast" is parse_professor_page (DEFAULT_PARSER plus one shared PageIndex).
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from Utils.ragUtils import ScrapeProfs
+
+
+def parse_legacy(final_url: str, html: str) -> ScrapeProfs.ProfessorRecord:
+    soup = BeautifulSoup(html, "html.parser")
+    return ScrapeProfs.ProfessorRecord(
+        source_url=final_url,
+        name=ScrapeProfs.extract_name(soup),
+        emails=ScrapeProfs.extract_emails(soup),
+        information=ScrapeProfs.extract_biography(soup),
+        publications=ScrapeProfs.extract_publications(soup),
+    )
+
+
+def parse_fast(final_url: str, html: str) -> ScrapeProfs.ProfessorRecord:
+    return ScrapeProfs.parse_professor_page(final_url, html)
+
+
+MODES = {"legacy": parse_legacy, "fast": parse_fast}
+
+
+def save_corpus(url_file: str, corpus: str, limit: int) -> None:
+    os.makedirs(corpus, exist_ok=True)
+    with open(url_file, "r", encoding="utf-8") as f:
+        urls = [l.strip() for l in f if l.strip() and not l.startswith("#")][:limit]
+    for url in urls:
+        path = os.path.join(corpus, hashlib.sha1(url.encode()).hexdigest()[:16] + ".html")
+        if os.path.exists(path):
+            continue
+        try:
+            _, html = ScrapeProfs.fetch_html(url)
+        except Exception as e:
+            print(f"[error] {url} -> {e}", file=sys.stderr)
+            continue
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"[saved] {url}")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(corpus: str, repeat: int) -> dict:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        raise SystemExit(f"No .html files in {corpus}")
+
+    report = {"pages": len(pages), "repeat": repeat, "parser": ScrapeProfs.DEFAULT_PARSER, "modes": {}}
+    outputs = {}
+    for mode, fn in MODES.items():
+        per_page = []
+        for name, html in pages:
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                record = fn(name, html)
+                times.append((time.perf_counter() - start) * 1000)
+            per_page.append(min(times))
+            outputs.setdefault(name, {})[mode] = record
+        report["modes"][mode] = {
+            "mean_ms": statistics.mean(per_page),
+            "p50_ms": percentile(per_page, 50),
+            "p95_ms": percentile(per_page, 95),
+            "max_ms": max(per_page),
+            "total_ms": sum(per_page),
+        }
+
+    # Parser differences can change what gets extracted; report how many pages disagree
+    report["mismatched_pages"] = sorted(n for n, o in outputs.items() if o["legacy"] != o["fast"])
+    report["speedup"] = report["modes"]["legacy"]["mean_ms"] / report["modes"]["fast"]["mean_ms"]
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark ScrapeProfs parsing over saved faculty pages.")
+    ap.add_argument("--corpus", default="bench/corpus", help="Directory of saved .html pages.")
+    ap.add_argument("--save-from", help="Download pages listed in this URL file into --corpus first.")
+    ap.add_argument("--limit", type=int, default=50, help="Max pages to download with --save-from.")
+    ap.add_argument("--repeat", type=int, default=3, help="Parses per page; the fastest is kept.")
+    ap.add_argument("--out", help="Write the JSON report here as well as to stdout.")
+    args = ap.parse_args()
+
+    if args.save_from:
+        save_corpus(args.save_from, args.corpus, args.limit)
+
+    report = run(args.corpus, args.repeat)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
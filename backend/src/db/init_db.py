@@ -1,6 +1,40 @@
+import os
+from sqlalchemy import text
 from backend.src.db.database import Base, engine
-from backend.src.models.models import User, UserEmbedding, Professor, ProfessorEmbedding, ChatLog
+from backend.src.models.models import User, UserEmbedding, ResumeEmbedding, Professor, ProfessorEmbedding, ChatLog
+
+# ANN index on professor_embeddings for VECTOR_BACKEND=postgres: hnsw (default) or ivfflat
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "hnsw")
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "100"))
+
+print("Enabling pgvector...")
+with engine.begin() as conn:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
 
 print("Creating database tables...")
 Base.metadata.create_all(bind=engine)
+
+# create_all leaves existing tables alone; user embeddings are upserted on user_id, which needs this
+print("Ensuring user_embeddings has one row per user...")
+with engine.begin() as conn:
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS user_embeddings_user_id_key ON user_embeddings (user_id)"))
+
+print(f"Creating {VECTOR_INDEX} index on professor_embeddings...")
+with engine.begin() as conn:
+    if VECTOR_INDEX == "hnsw":
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS professor_embeddings_embedding_hnsw ON professor_embeddings "
+            f"USING hnsw (embedding vector_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+        ))
+    elif VECTOR_INDEX == "ivfflat":
+        # IVFFlat picks its centroids from the rows present now: build it after the first ingest
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS professor_embeddings_embedding_ivfflat ON professor_embeddings "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {IVFFLAT_LISTS})"
+        ))
+    else:
+        raise ValueError(f"Unknown VECTOR_INDEX: {VECTOR_INDEX}")
+    conn.execute(text("ANALYZE professor_embeddings"))
 print("✅ Done.")
@@ -1,12 +1,87 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+import os
+import json
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
+import numpy as np
 from Utils.SupabaseAPI import SupabaseAPI
-from Utils.ragUtils import EmbGenerator
+from Utils.ragUtils import EmbGenerator, VectorCodec
+from Utils.ragUtils.EmbBatcher import EmbeddingBatcher
+from Utils.ResumeJobs import ResumeJobs
+from Utils.MatchCache import MatchCache, corpus_Version, set_Version_Source
+from Utils.VectorStore import make_Vector_Store
+from Utils.LLMRAG import LLMRAG, context_cache, get_LLM_Pool
+from Utils.Metrics import metrics, RequestTimer
+
+# LOG_LEVEL=DEBUG brings back the per-request dumps (full embedding and match list)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger("rfindr")
 
 app = FastAPI()
 router = APIRouter()
-db = SupabaseAPI()
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "rpc")
+db = SupabaseAPI(use_local_index=VECTOR_BACKEND == "local" or os.getenv("USE_LOCAL_INDEX", "0") == "1")
+# Top-k search for matches and chat context (rpc / local / postgres)
+vector_store = make_Vector_Store(db, VECTOR_BACKEND)
+# How often the local index checks for a new corpus version, and the longest it goes without a reload
+LOCAL_INDEX_POLL_SECONDS = float(os.getenv("LOCAL_INDEX_POLL_SECONDS", "30"))
+LOCAL_INDEX_MAX_AGE = float(os.getenv("LOCAL_INDEX_MAX_AGE", "900"))
+index_refresh_task: Optional[asyncio.Task] = None
+
+# Model inference runs here so it never stalls the event loop.
+# Kept small on purpose: the model already uses every core for a single forward pass.
+embed_executor = ThreadPoolExecutor(max_workers=int(os.getenv("EMBED_WORKERS", "2")), thread_name_prefix="embed")
+# Blocking Supabase reads/writes (user embedding lookups and saves) get their own, wider pool so
+# concurrent requests never queue model inference behind database round-trips
+io_executor = ThreadPoolExecutor(max_workers=int(os.getenv("DB_IO_WORKERS", "16")), thread_name_prefix="db-io")
+
+# Concurrent requests that miss every cache are embedded together in one forward pass
+batcher = EmbeddingBatcher(
+    max_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "5")),
+    executor=embed_executor,
+)
+
+# Resume uploads are parsed and embedded on their own pools, away from /api/matches
+resume_jobs = ResumeJobs(
+    db,
+    workers=int(os.getenv("RESUME_WORKERS", "2")),
+    parse_workers=int(os.getenv("RESUME_PARSE_WORKERS", "1")),
+)
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(5 * 1024 * 1024)))
+# Queries per POST /api/matches/batch
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "1000"))
+
+# Rankings for identical requests, valid until ingestion bumps the corpus version
+match_cache = MatchCache(
+    max_size=int(os.getenv("MATCH_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("MATCH_CACHE_TTL", "3600")),
+    executor=io_executor,
+)
+# Without Redis, other processes' ingestion shows up as a newer professors.updated_at
+set_Version_Source(db.get_Corpus_Version)
+
+def collect_cache_metrics() -> list[tuple[str, dict, float]]:
+    matches = match_cache.stats()
+    embeddings = EmbGenerator.get_Cache().stats()
+    contexts = context_cache.stats()
+    return [
+        ("cache_entries", {"cache": "matches"}, matches["size"]),
+        ("cache_hit_rate", {"cache": "matches"}, matches["hit_rate"]),
+        ("cache_entries", {"cache": "embeddings"}, embeddings["size"]),
+        ("cache_hit_rate", {"cache": "embeddings"}, embeddings["hit_rate"]),
+        ("cache_entries", {"cache": "chat_context"}, contexts["size"]),
+        ("cache_hit_rate", {"cache": "chat_context"}, contexts["hit_rate"]),
+        ("embed_queue_depth", {}, batcher.stats()["queue_depth"]),
+    ]
+
+metrics.add_Collector(collect_cache_metrics)
 
 # Allow the frontend (Next.js dev) to call the API during development
 app.add_middleware(
@@ -17,29 +92,284 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency; a plain ASGI middleware so SSE streams are timed to their end
+app.add_middleware(RequestTimer)
+
+@app.on_event("startup")
+def warm_up_embedding_model():
+    # Load the shared embedding model once per worker before serving requests
+    EmbGenerator.warm_Up()
+
+@app.on_event("startup")
+async def start_batcher():
+    await batcher.start()
+
+@app.on_event("startup")
+def start_resume_jobs():
+    # Spawns the resume parser processes and waits for the first one, before requests arrive
+    resume_jobs.start()
+
+@app.on_event("startup")
+async def start_index_refresh():
+    global index_refresh_task
+    if db.index is not None:
+        index_refresh_task = asyncio.create_task(refresh_local_index())
+
+async def refresh_local_index():
+    """
+    Load the local index off the event loop, then keep it in step with ingestion, which runs in
+    other processes: reload when the corpus version moves (from Redis, or professors.updated_at
+    without it) or once the index is LOCAL_INDEX_MAX_AGE seconds old.
+    Until the first load succeeds rag_Search keeps using the Supabase RPC.
+    """
+    loaded_version, loaded_at = None, 0.0
+    while True:
+        version = await asyncio.to_thread(corpus_Version)
+        if version != loaded_version or time.monotonic() - loaded_at >= LOCAL_INDEX_MAX_AGE:
+            try:
+                await asyncio.to_thread(db.load_Index)
+                loaded_version, loaded_at = version, time.monotonic()
+            except Exception as e:
+                logger.warning("Failed to load local vector index, falling back to RPC: %s", e)
+        await asyncio.sleep(LOCAL_INDEX_POLL_SECONDS)
+
+@app.on_event("shutdown")
+async def close_clients():
+    if index_refresh_task is not None:
+        index_refresh_task.cancel()
+    await batcher.stop()
+    await db.aclose()
+    await vector_store.aclose()
+    resume_jobs.shutdown()
+    embed_executor.shutdown(wait=False)
+    io_executor.shutdown(wait=False)
+
 class MatchRequest(BaseModel):
-    interests: str
+    # Without interests text (or with use_resume) the user's uploaded resume is the query
+    interests: str = ""
+    use_resume: bool = False
     user_id: int
     num_matches: int
+    min_similarity: Optional[float] = None
+    department: Optional[str] = None
+    require_email: bool = False
 
 @app.post("/api/matches")
 async def get_professor_matches(request: MatchRequest):
     try:
-        print("Received match request:", request)
+        logger.debug("Received match request: %s", request)
+
+        start = time.perf_counter()
+        embedding = await get_query_embedding(request.user_id, request.interests, request.use_resume)
+
+        key = await match_cache.key_Async(embedding, request.num_matches, match_threshold=request.min_similarity,
+                                          department=request.department, require_email=request.require_email)
+        matches = await match_cache.get_Async(key)
+        hit = matches is not None
+        metrics.inc("match_cache_lookups", result="hit" if hit else "miss")
+        if not hit:
+            # Top professor matches from the configured vector backend
+            with metrics.stage("vector_search"):
+                matches = await vector_store.search(
+                    embedding,
+                    request.num_matches,
+                    match_threshold=request.min_similarity,
+                    department=request.department,
+                    require_email=request.require_email,
+                )
+            match_cache.put(key, matches)
+        match_cache.record(hit, time.perf_counter() - start)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated embedding: %s", embedding)
+            logger.debug("matches = %s", matches)
+
+        with metrics.stage("serialize"):
+            body = VectorCodec.dumps(matches)
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("ERROR in /api/matches: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BatchMatchRequest(BaseModel):
+    # Either interests texts (user_ids optional, echoed back) or only user_ids (their stored embeddings)
+    interests: Optional[list[str]] = None
+    user_ids: Optional[list[int]] = None
+    # For user_ids only: rank by the uploaded resume rather than the stored interests embedding
+    use_resume: bool = False
+    num_matches: int = 5
+    min_similarity: Optional[float] = None
+    department: Optional[str] = None
+    require_email: bool = False
+
+@app.post("/api/matches/batch")
+async def get_professor_matches_batch(request: BatchMatchRequest):
+    """
+    Newline-delimited JSON, one {"index", "user_id", "matches"} line per query as soon as it is ranked.
+    All interests are embedded in one batch and, with the local index, ranked in one matrix product.
+    """
+    interests, user_ids = request.interests, request.user_ids
+    if interests is None and user_ids is None:
+        raise HTTPException(status_code=400, detail="Provide interests or user_ids.")
+    if interests is not None and user_ids is not None and len(interests) != len(user_ids):
+        raise HTTPException(status_code=400, detail="interests and user_ids must be the same length.")
+    count = len(interests if interests is not None else user_ids)
+    if count > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch.")
+
+    loop = asyncio.get_running_loop()
+    try:
+        if interests is not None:
+            with metrics.stage("batch_embed"):
+                embeddings = await loop.run_in_executor(embed_executor, db.embed_Interests, interests)
+            rows = list(range(count))
+        else:
+            with metrics.stage("batch_user_lookup"):
+                stored = await loop.run_in_executor(io_executor, db.get_User_Embeddings, user_ids, request.use_resume)
+            rows = [i for i, uid in enumerate(user_ids) if uid in stored]
+            embeddings = np.vstack([stored[user_ids[i]] for i in rows]) if rows else np.empty((0, 0), np.float32)
+    except Exception as e:
+        logger.exception("ERROR in /api/matches/batch: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    metrics.inc("batch_match_queries", count)
 
-        # Generate embedding for the user's interests if it doesn't exist
-        #add logic to check if user after adding user auth, for now assume user doesn't have existing embedding
-        print("Embedding generating...")
-        embedding = EmbGenerator.generate_Embedding(request.interests)
+    def line(index: int, **fields) -> bytes:
+        user_id = user_ids[index] if user_ids is not None else None
+        return VectorCodec.dumps({"index": index, "user_id": user_id, **fields}) + b"\n"
 
-        # Query Supabase for top professor matches
-        matches = db.rag_Search(embedding, request.num_matches) or []
+    async def results():
+        for index in sorted(set(range(count)) - set(rows)):
+            yield line(index, error="No stored embedding for this user.")
+        if not rows:
+            return
+        start = time.perf_counter()
+        try:
+            async for row, matches in vector_store.search_Batch(
+                embeddings,
+                request.num_matches,
+                match_threshold=request.min_similarity,
+                department=request.department,
+                require_email=request.require_email,
+            ):
+                yield line(rows[row], matches=matches)
+        except Exception as e:
+            logger.exception("ERROR in /api/matches/batch: %s", e)
+            yield VectorCodec.dumps({"error": str(e)}) + b"\n"
+        finally:
+            metrics.observe("stage_seconds", time.perf_counter() - start, stage="batch_vector_search")
 
-        print("Generated embedding:", embedding)
-        print("matches =", matches)
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
-        return matches
+class ChatRequest(BaseModel):
+    question: str
+    interests: str = ""
+    use_resume: bool = False
+    user_id: int
+    num_matches: int = 5
 
+@app.post("/api/chat/stream")
+async def stream_chat(request: ChatRequest, http_request: Request):
+    """
+    Server-sent events: one "data: {"token": ...}" event per generated piece, then "event: done".
+    If the client goes away the LLM stream is closed, which stops generation in Ollama.
+    """
+    try:
+        # Follow-up turns with the same interests reuse the retrieved context and go straight to the LLM
+        session_key = (request.user_id, EmbGenerator.content_Hash(request.interests), request.use_resume)
+        chunks = context_cache.get(session_key, request.num_matches)
+        if chunks is None:
+            embedding = await get_query_embedding(request.user_id, request.interests, request.use_resume)
+            chunks = await vector_store.search(embedding, request.num_matches)
+            context_cache.put(session_key, request.num_matches, chunks)
+        rag = LLMRAG(request.user_id, None, request.num_matches, db=db, chunks=chunks, executor=embed_executor)
+    except HTTPException:
+        raise
     except Exception as e:
-        print("ERROR in /api/matches:", e)
+        logger.exception("ERROR in /api/chat/stream: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        stream = rag.astream_LLM(request.question)
+        start = time.perf_counter()
+        first = True
+        try:
+            async for token in stream:
+                if first:
+                    metrics.observe("chat_first_token_seconds", time.perf_counter() - start)
+                    first = False
+                if await http_request.is_disconnected():
+                    metrics.inc("chat_disconnects")
+                    return
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.exception("ERROR in /api/chat/stream: %s", e)
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/resume", status_code=202)
+async def upload_resume(user_id: int = Form(...), file: UploadFile = File(...)):
+    filename = file.filename or "resume.pdf"
+    if not filename.lower().endswith((".pdf", ".txt")):
+        raise HTTPException(status_code=400, detail="Resume must be a .pdf or .txt file.")
+    data = await file.read(RESUME_MAX_BYTES + 1)
+    if len(data) > RESUME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Resume file is too large.")
+    job_id = resume_jobs.submit(user_id, data, filename)
+    return {"job_id": job_id, "state": "queued"}
+
+@app.get("/api/resume/{job_id}")
+async def get_resume_status(job_id: str):
+    job = resume_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown resume job.")
+    return job
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/matches/stats")
+async def get_match_stats():
+    return match_cache.stats()
+
+@app.get("/api/embeddings/stats")
+async def get_embedding_stats():
+    return {"batcher": batcher.stats(), "cache": EmbGenerator.get_Cache().stats()}
+
+@app.get("/api/chat/stats")
+async def get_chat_stats():
+    return {"llm": get_LLM_Pool().stats(), "context_cache": context_cache.stats()}
+
+async def get_query_embedding(user_id: int, interests: str, use_resume: bool = False) -> np.ndarray:
+    # The interests text is the query; the uploaded resume only when asked for or when there is no text.
+    # Stored-embedding lookups are timed as user_lookup, only the model call as embed.
+    loop = asyncio.get_running_loop()
+    if use_resume or not interests.strip():
+        with metrics.stage("user_lookup"):
+            resume = await loop.run_in_executor(io_executor, db.find_Resume_Embedding, user_id)
+        if resume is not None:
+            return resume
+        if not interests.strip():
+            raise HTTPException(status_code=404, detail="No interests given and no resume on file for this user.")
+    # Reuse the stored user embedding unless the interests text changed since it was generated
+    with metrics.stage("user_lookup"):
+        embedding = await loop.run_in_executor(io_executor, db.find_User_Embedding, user_id, interests)
+    if embedding is None:
+        with metrics.stage("embed"):
+            embedding = await batcher.embed(interests)
+        io_executor.submit(save_user_embedding, user_id, interests, embedding)
+    return embedding
+
+def save_user_embedding(user_id: int, interests: str, embedding: np.ndarray) -> None:
+    try:
+        db.save_User_Embedding(user_id, interests, embedding)
+    except Exception as e:
+        logger.warning("Failed to store embedding for user ID %s: %s", user_id, e)
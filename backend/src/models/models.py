@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
+from pgvector.sqlalchemy import Vector
 from datetime import datetime
 from backend.src.db.database import Base
 
+# all-MiniLM-L6-v2; vectors are stored as pgvector float4 instead of float8[]
+EMBEDDING_DIM = 384
+
 # ---------- USER MODEL ----------
 class User(Base):
     __tablename__ = "users"
@@ -18,18 +22,33 @@ class User(Base):
 
     # Relationships
     embeddings = relationship("UserEmbedding", back_populates="user", cascade="all, delete-orphan")
+    resume = relationship("ResumeEmbedding", back_populates="user", cascade="all, delete-orphan", uselist=False)
     chatlogs = relationship("ChatLog", back_populates="user", cascade="all, delete-orphan")
 
 
 class UserEmbedding(Base):
     __tablename__ = "user_embeddings"
 
-    user_id = Column(Integer, ForeignKey("users.id"))
-    embedding = Column(ARRAY(Float), nullable=False)
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True)  # upserted on user_id
+    embedding = Column(Vector(EMBEDDING_DIM), nullable=False)
+    content_hash = Column(String)  # hash of the text the embedding was generated from
 
     user = relationship("User", back_populates="embeddings")
 
 
+class ResumeEmbedding(Base):
+    __tablename__ = "resume_embeddings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True)  # latest upload wins
+    embedding = Column(Vector(EMBEDDING_DIM), nullable=False)  # normalized mean of the resume's chunks
+    content_hash = Column(String)  # hash of the extracted resume text
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="resume")
+
+
 # ---------- PROFESSOR MODEL ----------
 class Professor(Base):
     __tablename__ = "professors"
@@ -39,6 +58,7 @@ class Professor(Base):
     department = Column(String, index=True)
     research_areas = Column(String, index=True)
     email = Column(String, unique=True, index=True)
+    content_hash = Column(String)  # hash of the scraped details the embeddings were built from
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -48,8 +68,10 @@ class Professor(Base):
 class ProfessorEmbedding(Base):
     __tablename__ = "professor_embeddings"
 
-    professor_id = Column(Integer, ForeignKey("professors.id"))
-    embedding = Column(ARRAY(Float), nullable=False)
+    id = Column(Integer, primary_key=True, index=True)
+    professor_id = Column(Integer, ForeignKey("professors.id"), index=True)
+    embedding = Column(Vector(EMBEDDING_DIM), nullable=False)
+    chunk = Column(String)  # the text window this embedding was generated from
 
     professor = relationship("Professor", back_populates="embeddings")
 